@@ -0,0 +1,355 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+# Extension of the files in the binary format, the parse and generate scripts pick the format by extension
+EXTENSION = ".bin"
+
+_MAGIC = b"CBAF"
+_VERSION = 2
+# magic, version, node count, string count, offset of the subtree ends, offset of the string table
+_header = struct.Struct("<4sIIIII")
+# depth, line, column, cursor kind, cursor spelling, type kind, usr, referenced usr, reference
+# : the strings (and names, which act as kind codes) are indices in the string table
+_record = struct.Struct("<9I")
+# Keys of the last strings of a record, only set when not empty
+_optional_keys = ("usr", "referenced_usr", "reference")
+_NO_STRING = 0xFFFFFFFF  # for a missing `usr`, `referenced_usr` or `reference`
+
+
+def _pack_array(values):
+    """Returns the bytes of an `array("I")`, little-endian like the records."""
+    if sys.byteorder != "little":
+        values = array("I", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def iter_nodes(parsed_info, depth=0):
+    """Yields the nodes of nested parsed infos in pre-order, as consumed by :class:`BinaryWriter`.
+
+    :param parsed_info: Parsed infos as returned by :meth:`clang_bind.parse.Parse.get_dict`
+    :type parsed_info: dict
+    :param depth: Depth of the root, defaults to 0
+    :type depth: int, optional
+    :return: (depth, parsed info without the `members` key) pairs
+    :rtype: generator
+    """
+    stack = [(parsed_info, depth)]
+    while stack:
+        info, depth = stack.pop()
+        yield depth, {key: value for key, value in info.items() if key != "members"}
+        stack.extend((member, depth + 1) for member in reversed(info["members"]))
+
+
+class BinaryWriter:
+    """This is a class which writes parsed infos in a compact binary format, while they are produced.
+
+    - Strings (spellings, USRs and the cursor and type kind names) are stored once, in a string table.
+    - Nodes are flat, fixed size records in pre-order, whose strings are indices in the string table.
+    - The index following each node's subtree is stored in a separate array, to skip subtrees while reading.
+
+    The file has to be seekable: the header is written last.
+
+    :param f: Binary file object to write to
+    :type f: file object
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self._strings = {}  # {string: index}
+        self._ends = array("I")  # index following each node's subtree
+        # (depth, index) of the nodes on the path to the last written node
+        self._stack = []
+        self.f.write(bytes(_header.size))
+
+    def _get_string_id(self, string):
+        string_id = self._strings.get(string)
+        if string_id is None:
+            string_id = self._strings[string] = len(self._strings)
+        return string_id
+
+    def _get_optional_string_id(self, string):
+        return self._get_string_id(string) if string else _NO_STRING
+
+    def _end_nodes(self, depth):
+        while self._stack and self._stack[-1][0] >= depth:
+            self._ends[self._stack.pop()[1]] = len(self._ends)
+
+    def write(self, depth, info):
+        """Writes a node.
+
+        :param depth: Depth of the node, the root's being 0
+        :type depth: int
+        :param info: Parsed info of the node, without the `members` key
+        :type info: dict
+        """
+        if not self._ends and depth:
+            raise ValueError("The first node should be the root")
+        if self._ends and not depth:
+            raise ValueError("Only one tree can be written")
+        self._end_nodes(depth)
+        self.f.write(
+            _record.pack(
+                depth,
+                info["line"],
+                info["column"],
+                self._get_string_id(info["cursor_kind"]["name"]),
+                self._get_string_id(info["cursor"]["spelling"]),
+                self._get_string_id(info["type"]["kind"]),
+                self._get_optional_string_id(info.get("usr")),
+                self._get_optional_string_id(info.get("referenced_usr")),
+                self._get_optional_string_id(info.get("reference")),
+            )
+        )
+        self._stack.append((depth, len(self._ends)))
+        self._ends.append(0)
+
+    def close(self):
+        """Ends the nodes left open and writes the string table and the header."""
+        self._end_nodes(0)
+        ends_offset = self.f.tell()
+        self.f.write(_pack_array(self._ends))
+        strings_offset = self.f.tell()
+        encoded = [string.encode() for string in self._strings]
+        offsets = array("I", [0])
+        for string in encoded:
+            offsets.append(offsets[-1] + len(string))
+        self.f.write(_pack_array(offsets))
+        self.f.write(b"".join(encoded))
+        self.f.seek(0)
+        self.f.write(
+            _header.pack(
+                _MAGIC,
+                _VERSION,
+                len(self._ends),
+                len(encoded),
+                ends_offset,
+                strings_offset,
+            )
+        )
+
+
+def dump(filepath, nodes):
+    """Writes parsed infos to a file in the binary format.
+
+    :param filepath: Path of the output file
+    :type filepath: str
+    :param nodes: (depth, parsed info without `members`) pairs in pre-order
+    , eg: from :meth:`clang_bind.parse.Parse.iter_dicts` or :func:`iter_nodes`
+    :type nodes: iterable
+    """
+    with open(filepath, "wb") as f:
+        writer = BinaryWriter(f)
+        for depth, info in nodes:
+            writer.write(depth, info)
+        writer.close()
+
+
+class BinaryReader:
+    """This is a class which memory-maps a file in the binary format, to read nodes on demand.
+
+    Loading costs a constant time regardless of the file's size: records, strings and the dicts exposed by
+    :class:`NodeView` are only decoded when accessed.
+
+    :param filepath: Path of the file
+    :type filepath: str
+    """
+
+    def __init__(self, filepath):
+        with open(filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.node_count,
+            string_count,
+            self._ends_offset,
+            self._strings_offset,
+        ) = _header.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise ValueError(f"{filepath} is not in the binary format {_VERSION}")
+        self._string_data_offset = self._strings_offset + 4 * (string_count + 1)
+        self._strings = [None] * string_count  # decoded on demand
+
+    def get_string(self, string_id):
+        """Returns a string of the string table.
+
+        :param string_id: Index of the string
+        :type string_id: int
+        :return: The string
+        :rtype: str
+        """
+        string = self._strings[string_id]
+        if string is None:
+            start, end = struct.unpack_from(
+                "<2I", self._mmap, self._strings_offset + 4 * string_id
+            )
+            string = self._strings[string_id] = self._mmap[
+                self._string_data_offset + start : self._string_data_offset + end
+            ].decode()
+        return string
+
+    def get_record(self, index):
+        """Returns the record of a node.
+
+        :param index: Index of the node, in pre-order
+        :type index: int
+        :return: (depth, line, column, cursor kind, cursor spelling, type kind, usr, referenced usr, reference)
+        , the strings being indices in the string table
+        :rtype: tuple
+        """
+        return _record.unpack_from(self._mmap, _header.size + _record.size * index)
+
+    def get_end(self, index):
+        """Returns the index following the subtree of a node.
+
+        :param index: Index of the node, in pre-order
+        :type index: int
+        :return: Index of the node's next sibling, or of the next node outside its parent
+        :rtype: int
+        """
+        return struct.unpack_from("<I", self._mmap, self._ends_offset + 4 * index)[0]
+
+    def get_node(self, index):
+        """Returns a node.
+
+        :param index: Index of the node, in pre-order
+        :type index: int
+        :return: View of the node
+        :rtype: class:`clang_bind.binary_format.NodeView`
+        """
+        return NodeView(self, index)
+
+    def get_root(self):
+        """Returns the root node.
+
+        :return: View of the root node
+        :rtype: class:`clang_bind.binary_format.NodeView`
+        """
+        return self.get_node(0)
+
+    def close(self):
+        """Unmaps the file, invalidating the views."""
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class NodeView(Mapping):
+    """This is a class which exposes a node of a :class:`BinaryReader` as a read-only dict
+    , in the schema consumed by :mod:`clang_bind.generate`.
+
+    :param reader: Reader of the file
+    :type reader: class:`clang_bind.binary_format.BinaryReader`
+    :param index: Index of the node, in pre-order
+    :type index: int
+    """
+
+    __slots__ = ("_reader", "_index", "_record")
+
+    def __init__(self, reader, index):
+        self._reader = reader
+        self._index = index
+        self._record = reader.get_record(index)
+
+    def _keys(self):
+        keys = ("depth", "line", "column", "cursor_kind", "cursor", "type", "members")
+        return keys + tuple(
+            key
+            for key, string_id in zip(_optional_keys, self._record[6:])
+            if string_id != _NO_STRING
+        )
+
+    def __getitem__(self, key):
+        record, get_string = self._record, self._reader.get_string
+        if key == "depth":
+            return record[0]
+        if key == "line":
+            return record[1]
+        if key == "column":
+            return record[2]
+        if key == "cursor_kind":
+            return {"name": get_string(record[3])}
+        if key == "cursor":
+            return {"spelling": get_string(record[4])}
+        if key == "type":
+            return {"kind": get_string(record[5])}
+        if key == "members":
+            return MembersView(self._reader, self._index)
+        if key in _optional_keys:
+            string_id = record[6 + _optional_keys.index(key)]
+            if string_id != _NO_STRING:
+                return get_string(string_id)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"NodeView:{self._index}"
+
+
+class MembersView(Sequence):
+    """This is a class which exposes the children of a node of a :class:`BinaryReader` as a read-only list.
+
+    Any reader providing `get_end` and `get_node` can be used, eg: :class:`clang_bind.lazy_json.LazyJSONReader`.
+
+    :param reader: Reader of the file
+    :type reader: class:`clang_bind.binary_format.BinaryReader`
+    :param index: Index of the parent node, in pre-order
+    :type index: int
+    """
+
+    __slots__ = ("_reader", "_index", "_children")
+
+    def __init__(self, reader, index):
+        self._reader = reader
+        self._index = index
+        self._children = None  # indices of the children, found on first use
+
+    def _get_children(self):
+        if self._children is None:
+            self._children = []
+            child, end = self._index + 1, self._reader.get_end(self._index)
+            while child < end:
+                self._children.append(child)
+                child = self._reader.get_end(child)
+        return self._children
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._reader.get_node(child) for child in self._get_children()[i]]
+        return self._reader.get_node(self._get_children()[i])
+
+    def __len__(self):
+        return len(self._get_children())
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"MembersView:{self._index}"
+
+
+def load(filepath):
+    """Memory-maps a file in the binary format.
+
+    :param filepath: Path of the file
+    :type filepath: str
+    :return: View of the root node, the file stays mapped while views of it are alive
+    :rtype: class:`clang_bind.binary_format.NodeView`
+    """
+    return BinaryReader(filepath).get_root()
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import clang.cindex as clang
+
+import clang_bind.utils as utils
+
+
+def get_libclang_version():
+    """Returns the version string of the loaded libclang.
+
+    :return: libclang version, eg: `clang version 12.0.0`
+    :rtype: str
+    """
+    # `clang_getClangVersion` is not registered by cindex.py
+    clang.register_function(
+        clang.conf.lib,
+        ("clang_getClangVersion", [], clang._CXString, clang._CXString.from_result),
+        False,
+    )
+    return clang.conf.lib.clang_getClangVersion()
+
+
+class ParseCache:
+    """This is a class which caches parse results on disk, addressed by the contents they were parsed from.
+
+    - Lookups are done in two steps, like ccache's direct mode:
+        1. A manifest, keyed by the libclang version, the parse options, the compiler arguments and the source's
+        contents, lists the files the source includes (transitively) and the headers of its precompiled header
+        , if any: precompiled headers differ on every build, so their contents can't be part of the key.
+        2. The result, keyed by the manifest key and the contents of those files, holds the serialized parse
+        result.
+    - The cache is kept under a maximum size, by evicting the least recently used entries.
+    - Hits and misses are counted across runs.
+
+    :param cache_dir: Directory to keep the cache in
+    :type cache_dir: str
+    :param max_size: Maximum size of the cache in bytes, defaults to 5 GiB
+    :type max_size: int, optional
+    """
+
+    def __init__(self, cache_dir, max_size=5 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._file_hashes = {}  # {(path, modification time, size): contents hash}
+        self._libclang_version = None
+
+    def _get_path(self, category, key):
+        return os.path.join(self.cache_dir, category, key[:2], f"{key[2:]}.json")
+
+    def _get_file_hash(self, path):
+        """Returns the hash of the file's contents, memoized while the file is unchanged.
+
+        :param path: Path of the file
+        :type path: str
+        :return: Contents hash, `None` if the file does not exist
+        :rtype: str
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stat_key = (path, stat.st_mtime_ns, stat.st_size)
+        if stat_key not in self._file_hashes:
+            self._file_hashes[stat_key] = utils.get_file_hash(path)
+        return self._file_hashes[stat_key]
+
+    def _get_manifest_key(self, file, compiler_arguments, options):
+        if self._libclang_version is None:
+            self._libclang_version = get_libclang_version()
+        return hashlib.sha256(
+            json.dumps(
+                [
+                    self._libclang_version,
+                    options,
+                    list(compiler_arguments),
+                    file,
+                    self._get_file_hash(file),
+                ],
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    def _get_result_key(self, manifest_key, includes):
+        return hashlib.sha256(
+            json.dumps(
+                [manifest_key]
+                + [[include, self._get_file_hash(include)] for include in includes]
+            ).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def _read(path):
+        """Reads a cache entry, marking it as recently used.
+
+        :param path: Path of the entry
+        :type path: str
+        :return: The entry, `None` if it does not exist
+        """
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # entries are evicted by modification time
+        return entry
+
+    @staticmethod
+    def _write(path, entry):
+        """Writes a cache entry atomically, so concurrent workers never read partial entries.
+
+        :param path: Path of the entry
+        :type path: str
+        :param entry: The entry, JSON serializable
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def get(self, file, compiler_arguments, options=None):
+        """Returns the cached parse result of the file.
+
+        :param file: Parsed file
+        :type file: str
+        :param compiler_arguments: Compiler arguments used while parsing
+        :type compiler_arguments: list
+        :param options: Other parse options affecting the result, JSON serializable, defaults to None
+        :type options: dict, optional
+        :return: The cached parse result, `None` on a miss
+        """
+        manifest_key = self._get_manifest_key(file, compiler_arguments, options)
+        includes = self._read(self._get_path("manifests", manifest_key))
+        if includes is None:
+            return None
+        return self._read(
+            self._get_path("results", self._get_result_key(manifest_key, includes))
+        )
+
+    def get_includes(self, file, compiler_arguments, options=None):
+        """Returns the files included by the file, as recorded when its parse result was cached.
+
+        :param file: Parsed file
+        :type file: str
+        :param compiler_arguments: Compiler arguments used while parsing
+        :type compiler_arguments: list
+        :param options: Other parse options affecting the result, JSON serializable, defaults to None
+        :type options: dict, optional
+        :return: Paths of the included files, `None` on a miss
+        :rtype: list
+        """
+        return self._read(
+            self._get_path(
+                "manifests",
+                self._get_manifest_key(file, compiler_arguments, options),
+            )
+        )
+
+    def put(self, file, compiler_arguments, includes, result, options=None):
+        """Caches the parse result of the file.
+
+        :param file: Parsed file
+        :type file: str
+        :param compiler_arguments: Compiler arguments used while parsing
+        :type compiler_arguments: list
+        :param includes: Paths of the files included (transitively) by the file, and of the inputs of its precompiled
+        header, if any (see :meth:`clang_bind.parse.PrecompiledHeaders.get_inputs`)
+        :type includes: list
+        :param result: The parse result, JSON serializable
+        :param options: Other parse options affecting the result, JSON serializable, defaults to None
+        :type options: dict, optional
+        """
+        manifest_key = self._get_manifest_key(file, compiler_arguments, options)
+        includes = sorted(includes)
+        self._write(self._get_path("manifests", manifest_key), includes)
+        self._write(
+            self._get_path("results", self._get_result_key(manifest_key, includes)),
+            result,
+        )
+
+    def _get_entries(self):
+        """Returns the cache entries' (modification time, size, path), least recently used first."""
+        entries = []
+        for category in ("manifests", "results"):
+            for root, _, files in os.walk(os.path.join(self.cache_dir, category)):
+                for file in files:
+                    path = os.path.join(root, file)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """Evicts the least recently used entries, down to 90% of the maximum size if it is exceeded.
+
+        :return: Number of evicted entries
+        :rtype: int
+        """
+        entries = self._get_entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        evicted = 0
+        if size > self.max_size:
+            for _, entry_size, path in entries:
+                if size <= 0.9 * self.max_size:
+                    break
+                os.remove(path)
+                size -= entry_size
+                evicted += 1
+        return evicted
+
+    def _get_stats_path(self):
+        return os.path.join(self.cache_dir, "stats.json")
+
+    def update_stats(self, hits=0, misses=0):
+        """Adds hits and misses to the statistics kept in the cache directory.
+
+        :param hits: Number of hits to add, defaults to 0
+        :type hits: int, optional
+        :param misses: Number of misses to add, defaults to 0
+        :type misses: int, optional
+        """
+        stats = self.get_stats()
+        self._write(
+            self._get_stats_path(),
+            {"hits": stats["hits"] + hits, "misses": stats["misses"] + misses},
+        )
+
+    def get_stats(self):
+        """Returns the cache statistics.
+
+        :return: {"hits": number of hits, "misses": number of misses}
+        :rtype: dict
+        """
+        try:
+            with open(self._get_stats_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
@@ -1,4 +1,6 @@
 import inspect
+from functools import lru_cache
+
 import clang.cindex as clang
 
 
@@ -37,6 +39,46 @@ def getmembers_static(object, predicate=None):
     return results
 
 
+# A list to ignore the functions/properties that causes segmentation errors.
+ignore_list = [
+    "mangled_name",
+    "get_address_space",
+    "get_typedef_name",
+    "tls_kind",
+]
+
+
+@lru_cache(maxsize=None)
+def get_reflection_plan(cls):
+    """
+    Returns the members of a class to evaluate on its objects, classified once per class.
+
+    - The functions and properties of the classes in cindex.py never change at runtime, while `getmembers_static`
+      (`dir`, sort and `getattr_static` on every attribute) is expensive: it is run once per class instead of once
+      per object.
+
+    Parameters:
+        - cls (type): The class of the objects, eg: `clang.cindex.Cursor`
+
+    Returns:
+        - plan (tuple): (check functions, get functions, properties), each a tuple of (name, function) pairs
+          sorted by name, the properties' functions being their getters
+    """
+
+    check_functions, get_functions, properties = [], [], []
+    for name, func in getmembers_static(cls):
+        if name in ignore_list:
+            continue
+        if inspect.isfunction(func):  # if function
+            if name.startswith("is_"):
+                check_functions.append((name, func))
+            if name.startswith("get_"):
+                get_functions.append((name, func))
+        elif isinstance(func, property):  # else, property
+            properties.append((name, func.fget))
+    return tuple(check_functions), tuple(get_functions), tuple(properties)
+
+
 class ClangUtils:
     """
     Clang's cindex class utilities.
@@ -68,30 +110,16 @@ class ClangUtils:
         self.get_functions_dict = {}
         self.properties_dict = {}
 
-        # A list to ignore the functions/properties that causes segmentation errors.
-        ignore_list = [
-            "mangled_name",
-            "get_address_space",
-            "get_typedef_name",
-            "tls_kind",
-        ]
-
-        # populate dicts
-        valid_entries = filter(
-            lambda entry: entry[0] not in ignore_list, getmembers_static(object)
-        )
-        for name, func in valid_entries:
-            if inspect.isfunction(func):  # if function
-                try:  # cindex.py's functions raise exceptions internally
-                    if name.startswith("is_"):
-                        self.check_functions_dict[name] = func(object)
-                    if name.startswith("get_"):
-                        self.get_functions_dict[name] = func(object)
-                except:
-                    continue
-            elif isinstance(func, property):  # else, property
-                try:  # cindex.py's property functions raise exceptions internally
-                    self.properties_dict[name] = getattr(object, name)
+        # populate dicts, from the plan of the object's class
+        check_functions, get_functions, properties = get_reflection_plan(type(object))
+        for functions_dict, functions in (
+            (self.check_functions_dict, check_functions),
+            (self.get_functions_dict, get_functions),
+            (self.properties_dict, properties),
+        ):
+            for name, func in functions:
+                try:  # cindex.py's (property) functions raise exceptions internally
+                    functions_dict[name] = func(object)
                 except:
                     continue
 
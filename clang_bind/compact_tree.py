@@ -0,0 +1,172 @@
+from array import array
+
+import clang.cindex as clang
+
+
+class CompactTree:
+    """This is an array-backed tree of cursors, a compact alternative to :class:`treelib.Tree`.
+
+    - Nodes are identified by integers, in the order they were created (pre-order, when built from a traversal).
+    - Links (parent, first child, next sibling), cursor kind ids and interned spellings are kept in flat arrays.
+    - Cursors are kept as their raw `CXCursor` fields in flat arrays too, and re-created on access
+    : :class:`clang.cindex.Cursor` objects cache their location and spelling, and would cost far more than the tree.
+    - Methods shared with :class:`treelib.Tree` (`root`, `is_branch`, `paths_to_leaves`, etc.) behave the same
+    , except that nodes are represented by their identifiers.
+    """
+
+    def __init__(self):
+        self.parents = array("i")
+        self.first_children = array("i")
+        self.next_siblings = array("i")
+        self._last_children = array("i")
+        self.kind_ids = array("H")
+        self.spelling_ids = array("I")
+        self.strings = []  # interned strings, indexed by `spelling_ids`
+        self._string_ids = {}
+        self.cursor_xdata = array("i")
+        self.cursor_data = array("Q")  # 3 pointers per cursor
+        self.translation_unit = None
+
+    @property
+    def root(self):
+        return 0 if self.parents else None
+
+    def __len__(self):
+        return len(self.parents)
+
+    def __contains__(self, node_id):
+        return isinstance(node_id, int) and 0 <= node_id < len(self.parents)
+
+    def size(self):
+        return len(self.parents)
+
+    def intern(self, string):
+        """Returns the identifier of the string in the string table, adding it if needed.
+
+        :param string: String to intern
+        :type string: str
+        :return: String identifier
+        :rtype: int
+        """
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def create_node(self, cursor, parent=None):
+        """Adds a node holding the cursor as the last child of `parent`.
+
+        :param cursor: An object of :class:`clang.cindex.Cursor`
+        :type cursor: class:`clang.cindex.Cursor`
+        :param parent: Parent node identifier, defaults to None: create the root
+        :type parent: int, optional
+        :return: Node identifier
+        :rtype: int
+        """
+        node_id = len(self.parents)
+        if parent is None:
+            parent = -1
+            if node_id:
+                raise ValueError("A tree can only have one root")
+            self.translation_unit = cursor._tu
+        elif self._last_children[parent] == -1:
+            self.first_children[parent] = node_id
+        else:
+            self.next_siblings[self._last_children[parent]] = node_id
+        if parent != -1:
+            self._last_children[parent] = node_id
+
+        self.parents.append(parent)
+        self.first_children.append(-1)
+        self.next_siblings.append(-1)
+        self._last_children.append(-1)
+        self.kind_ids.append(cursor._kind_id)
+        self.spelling_ids.append(self.intern(cursor.spelling))
+        self.cursor_xdata.append(cursor.xdata)
+        self.cursor_data.extend(pointer or 0 for pointer in cursor.data)
+        return node_id
+
+    def get_cursor(self, node_id):
+        """Returns the cursor of the node, re-created from its raw fields.
+
+        :param node_id: Node identifier
+        :type node_id: int
+        :return: An object of :class:`clang.cindex.Cursor`
+        :rtype: class:`clang.cindex.Cursor`
+        """
+        cursor = clang.Cursor()
+        cursor._kind_id = self.kind_ids[node_id]
+        cursor.xdata = self.cursor_xdata[node_id]
+        cursor.data[:] = self.cursor_data[3 * node_id : 3 * node_id + 3]
+        cursor._tu = self.translation_unit
+        return cursor
+
+    def get_kind(self, node_id):
+        return clang.CursorKind.from_id(self.kind_ids[node_id])
+
+    def get_spelling(self, node_id):
+        return self.strings[self.spelling_ids[node_id]]
+
+    def parent(self, node_id):
+        """Returns the parent node identifier, `None` for the root."""
+        parent = self.parents[node_id]
+        return None if parent == -1 else parent
+
+    def iter_children(self, node_id):
+        """Yields the children node identifiers, by following the sibling links."""
+        child = self.first_children[node_id]
+        while child != -1:
+            yield child
+            child = self.next_siblings[child]
+
+    def children(self, node_id):
+        return list(self.iter_children(node_id))
+
+    def is_branch(self, node_id):
+        return list(self.iter_children(node_id))
+
+    def expand_tree(self, node_id=None):
+        """Yields the node identifiers of the subtree rooted at `node_id` in pre-order."""
+        node_id = self.root if node_id is None else node_id
+        if node_id is None:
+            return
+        stack = [node_id]
+        while stack:
+            node_id = stack.pop()
+            yield node_id
+            stack.extend(reversed(self.is_branch(node_id)))
+
+    def leaves(self, node_id=None):
+        return [
+            node_id
+            for node_id in self.expand_tree(node_id)
+            if self.first_children[node_id] == -1
+        ]
+
+    def level(self, node_id):
+        level = 0
+        while self.parents[node_id] != -1:
+            node_id = self.parents[node_id]
+            level += 1
+        return level
+
+    def depth(self):
+        return max((self.level(leaf) for leaf in self.leaves()), default=0)
+
+    def paths_to_leaves(self):
+        """Returns the paths (lists of node identifiers) from the root to each leaf."""
+        paths = []
+        for leaf in self.leaves():
+            path = [leaf]
+            while self.parents[path[-1]] != -1:
+                path.append(self.parents[path[-1]])
+            paths.append(path[::-1])
+        return paths
+
+    def show(self):
+        for node_id in self.expand_tree():
+            indent = "    " * self.level(node_id)
+            print(
+                f"{indent}{self.get_kind(node_id).name}:'{self.get_spelling(node_id)}'"
+            )
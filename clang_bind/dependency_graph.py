@@ -0,0 +1,142 @@
+import json
+import os
+
+import clang_bind.utils as utils
+
+
+class DependencyGraph:
+    """This is a class which keeps the files each translation unit depends on between runs
+    , to find the translation units to re-parse after some files changed.
+
+    - Each translation unit is recorded with its compiler arguments, its parse and output options, and the contents
+    hashes of its dependencies: the source file, the files it includes (transitively) and the inputs of its
+    precompiled header, if any.
+    - Contents hashes are only re-computed for files whose modification time or size differs from the recorded ones.
+
+    :param path: Path of the file to keep the graph in, loaded if it exists
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # {source file: {"compiler_arguments": list, "options": dict, "dependencies": {dependency: contents hash}}}
+        self.translation_units = {}
+        # {dependency: {"mtime": int, "size": int, "hash": str}}
+        self.files = {}
+        if os.path.exists(path):
+            state = utils.read_json(path)
+            self.translation_units = state["translation_units"]
+            self.files = state["files"]
+
+    def get_file_hash(self, path):
+        """Returns the contents hash of the file, re-computed only if it was modified since it was last hashed.
+
+        :param path: Path of the file
+        :type path: str
+        :return: Contents hash, `None` if the file does not exist
+        :rtype: str
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        state = self.files.get(path)
+        if state is None or (stat.st_mtime_ns, stat.st_size) != (
+            state["mtime"],
+            state["size"],
+        ):
+            state = self.files[path] = {
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "hash": utils.get_file_hash(path),
+            }
+        return state["hash"]
+
+    def is_dirty(self, file, compiler_arguments, options=None):
+        """Returns if the source file has to be re-parsed: it is new, its compiler arguments or options changed or one
+        of its dependencies changed.
+
+        :param file: Source file
+        :type file: str
+        :param compiler_arguments: Compiler arguments to parse it with
+        :type compiler_arguments: list
+        :param options: Other options affecting the parse or its output, JSON serializable, defaults to None
+        :type options: dict, optional
+        :return: True if the source file has to be re-parsed
+        :rtype: bool
+        """
+        translation_unit = self.translation_units.get(file)
+        return (
+            translation_unit is None
+            or translation_unit["compiler_arguments"] != list(compiler_arguments)
+            or translation_unit.get("options") != options
+            or any(
+                self.get_file_hash(path) != file_hash
+                for path, file_hash in translation_unit["dependencies"].items()
+            )
+        )
+
+    def get_dirty_files(self, compilation_arguments, options=None):
+        """Returns the source files to re-parse.
+
+        :param compilation_arguments: Source files and their compiler arguments: {filename: compiler arguments}
+        :type compilation_arguments: dict
+        :param options: Source files and their other options, see :meth:`is_dirty`: {filename: options}
+        , defaults to None: no options
+        :type options: dict, optional
+        :return: Source files to re-parse, sorted
+        :rtype: list
+        """
+        options = options or {}
+        return sorted(
+            file
+            for file, compiler_arguments in compilation_arguments.items()
+            if self.is_dirty(file, compiler_arguments, options.get(file))
+        )
+
+    def update(self, file, compiler_arguments, dependencies, options=None):
+        """Records the dependencies of a freshly parsed source file.
+
+        :param file: Source file
+        :type file: str
+        :param compiler_arguments: Compiler arguments it was parsed with
+        :type compiler_arguments: list
+        :param dependencies: Paths of the files it depends on, besides itself
+        :type dependencies: list
+        :param options: Other options affecting the parse or its output, JSON serializable, defaults to None
+        :type options: dict, optional
+        """
+        self.translation_units[file] = {
+            "compiler_arguments": list(compiler_arguments),
+            "options": options,
+            "dependencies": {
+                path: self.get_file_hash(path)
+                for path in sorted({file, *map(os.path.abspath, dependencies)})
+            },
+        }
+
+    def remove(self, file):
+        """Forgets a source file, so that it is re-parsed on the next run, eg: after it failed to parse.
+
+        :param file: Source file
+        :type file: str
+        """
+        self.translation_units.pop(file, None)
+
+    def save(self):
+        """Saves the graph, dropping the files no translation unit depends on anymore."""
+        dependencies = {
+            path
+            for translation_unit in self.translation_units.values()
+            for path in translation_unit["dependencies"]
+        }
+        self.files = {
+            path: state for path, state in self.files.items() if path in dependencies
+        }
+        utils.ensure_dir_exists(os.path.dirname(os.path.abspath(self.path)))
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"translation_units": self.translation_units, "files": self.files}, f
+            )
+        os.replace(tmp_path, self.path)
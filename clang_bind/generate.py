@@ -1,7 +1,31 @@
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 import os
 
+import clang_bind.binary_format as binary_format
+import clang_bind.lazy_json as lazy_json
 import clang_bind.utils as utils
+from clang_bind.metrics import Metrics, measure
+from clang_bind.symbol_index import SymbolIndex
+
+# Cursor kinds read while generating, the rest can be pruned while parsing
+# , see `clang_bind.parse.Parse`'s `allowed_kinds`
+GENERATED_KINDS = frozenset(
+    {
+        "TRANSLATION_UNIT",
+        "NAMESPACE",
+        "INCLUSION_DIRECTIVE",
+        "STRUCT_DECL",
+        "CLASS_DECL",
+        "CXX_BASE_SPECIFIER",  # in (handle_struct_decl)
+        "FIELD_DECL",  # in (handle_struct_decl)
+        "CXX_METHOD",  # in (handle_struct_decl)
+        "CONSTRUCTOR",
+        "PARM_DECL",  # in (handle_constructor) and (handle_function)
+        "FUNCTION_DECL",
+        "TYPE_REF",  # in (handle_struct_decl) and (get_parm_types)
+        "NAMESPACE_REF",  # in (get_parm_types)
+    }
+)
 
 
 class bind:
@@ -20,12 +44,16 @@ class bind:
         "using namespace py::literals;",
     ]  # initial pybind lines to be written to binded file
 
-    def __init__(self, root: dict, module_name: str) -> None:
+    def __init__(
+        self, root: dict, module_name: str, symbol_index: SymbolIndex = None
+    ) -> None:
         self._module_name = module_name  # main python module name
+        self._symbol_index = symbol_index  # to resolve referenced names, if any
         self._state_stack = []  # stack to keep track of the state (node kind)
         self._linelist = []  # list of lines to be written to the binding file
         self._skipped = []  # list of skipped items, to be used for debugging purposes
         self._inclusion_list = []  # list of all inclusion directives (included files)
+        self._node_count = 0  # number of handled nodes, for metrics
         handled_by_pybind = self.skip  # handled by pybind11
         handled_elsewhere = self.skip  # handled in another kind's function
         no_need_to_handle = self.skip  # unnecessary kind
@@ -158,6 +186,44 @@ class bind:
                 fields += bind.get_fields_from_anonymous(item=sub_item)
         return fields
 
+    def lookup_qualified_name(self, item: dict) -> Optional[str]:
+        """
+        Looks up the fully qualified name of the declaration an item refers to, eg: the type of a `CursorKind.TYPE_REF`.
+
+        Parameters:
+            - item (dict): the referring item
+
+        Returns:
+            - qualified_name (str): The fully qualified name, None if there is no symbol index or it lacks the declaration
+        """
+
+        if self._symbol_index is None or not item.get("referenced_usr"):
+            return None
+        return self._symbol_index.get_qualified_name(item["referenced_usr"])
+
+    def get_referenced_name(self, item: dict, fallback: str = None) -> str:
+        """
+        Returns the name of the declaration an item refers to.
+
+        Parameters:
+            - item (dict): the referring item
+            - fallback (str): name to use if it can't be looked up, defaults to the item's spelling
+            without the `struct ` and `pcl::` prefixes
+
+        Returns:
+            - name (str): The fully qualified name if it can be looked up, else the fallback
+        """
+
+        qualified_name = self.lookup_qualified_name(item)
+        if qualified_name:
+            return qualified_name
+        if fallback is not None:
+            return fallback
+        # @TODO: Make more robust
+        return (
+            str(item["cursor"]["spelling"]).replace("struct ", "").replace("pcl::", "")
+        )
+
     def handle_node(self, item: dict) -> None:
         """
         Function for handling a node (any type).
@@ -173,11 +239,19 @@ class bind:
           <<<
             5. End the scope, if applicable.
             6. Pop the item's info from the stack.
+        - References to declarations merged into another translation unit's output are skipped.
         """
 
+        self._node_count += 1
         self.item = item
         self.kind = self.item["cursor_kind"]["name"]
         self.name = self.item["cursor"]["spelling"]
+
+        # declaration stored once, in the output of the translation unit it refers to
+        if "reference" in self.item:
+            self.skip()
+            return
+
         self.members = self.item["members"]
         self.depth = self.item["depth"]
 
@@ -223,26 +297,22 @@ class bind:
         for sub_item in self.members:
             if sub_item["cursor_kind"]["name"] == "TYPE_REF":
                 # TODO: Will this case only apply to templates?
-                # @TODO: Make more robust
-                type_ref = (
-                    sub_item["cursor"]["spelling"]
-                    .replace("struct ", "")
-                    .replace("pcl::", "")
-                )
+                qualified_name = self.lookup_qualified_name(sub_item)
+                type_ref = self.get_referenced_name(sub_item)
                 template_class_name = f"{self.name}<{type_ref}>"
-                template_class_name_python = f"{self.name}_{type_ref}"
+                # Only looked up names are fully qualified, spellings are kept as is
+                template_class_name_python = (
+                    f"{self.name}_{qualified_name.split('::')[-1]}"
+                    if qualified_name
+                    else f"{self.name}_{type_ref}"
+                )
 
-        base_class_list = [
-            sub_item["cursor"]["spelling"]
+        base_class_list_string = [
+            self.get_referenced_name(sub_item)
             for sub_item in self.members
             if sub_item["cursor_kind"]["name"] == "CXX_BASE_SPECIFIER"
         ]
 
-        base_class_list_string = [
-            str(cls).replace("struct ", "").replace("pcl::", "")
-            for cls in base_class_list
-        ]
-
         if template_class_name:
             struct_details = ",".join([template_class_name] + base_class_list_string)
             self._linelist.append(
@@ -336,12 +406,7 @@ class bind:
         if item["type"]["kind"] == "LValueReference":
             for sub_item in item["members"]:
                 if sub_item["cursor_kind"]["name"] == "TYPE_REF":
-                    # @TODO: Make more robust
-                    type_ref = (
-                        sub_item["cursor"]["spelling"]
-                        .replace("struct ", "")
-                        .replace("pcl::", "")
-                    )
+                    type_ref = self.get_referenced_name(sub_item)
                     parameter_type_list = f"{type_ref} &"
         elif item["type"]["kind"] == "Elaborated":
             namespace_ref = ""
@@ -349,8 +414,9 @@ class bind:
                 if sub_item["cursor_kind"]["name"] == "NAMESPACE_REF":
                     namespace_ref += f'{sub_item["cursor"]["spelling"]}::'
                 if sub_item["cursor_kind"]["name"] == "TYPE_REF":
-                    parameter_type_list = (
-                        f'{namespace_ref}{sub_item["cursor"]["spelling"]}'
+                    parameter_type_list = self.get_referenced_name(
+                        sub_item,
+                        fallback=f'{namespace_ref}{sub_item["cursor"]["spelling"]}',
                     )
         elif item["type"]["kind"] in ("Float", "Double", "Int"):
             parameter_type_list = f'{item["type"]["kind"].lower()}'
@@ -370,14 +436,23 @@ class bind:
         #     self._inclusion_list.append(self.name)
 
 
-def generate(module_name: str, parsed_info: dict = None, source: str = None) -> str:
+def generate(
+    module_name: str,
+    parsed_info: dict = None,
+    source: str = None,
+    symbol_index: SymbolIndex = None,
+    metrics: Metrics = None,
+) -> str:
     """
     The main function which handles generation of bindings.
 
     Parameters:
         - module_name (str): Generated python module's name.
         - parsed_info (dict): Parsed info about a C++ source file.
-        - source (str): File name
+        - source (str): File name, of a JSON file (decoded lazily if indexed) or of a binary file (memory-mapped)
+          given its extension
+        - symbol_index (SymbolIndex): Index to resolve referenced names with, instead of their spellings.
+        - metrics (Metrics): Metrics to record the read and generation stages in.
 
     Returns:
         - lines_to_write (list): Lines to write in the binded file.
@@ -417,8 +492,15 @@ def generate(module_name: str, parsed_info: dict = None, source: str = None) ->
     # Argument checks and `parsed_info` value initialisation
     if parsed_info and source:  # Both args passed, choose parsed_info.
         print("Both parsed_info and source arguments provided, choosing parsed_info.")
+    elif source and source.endswith(binary_format.EXTENSION):  # If binary, map it.
+        with measure(metrics, "read_binary", source):
+            parsed_info = binary_format.load(source)
+    elif source and lazy_json.is_indexed(source):  # If indexed, map it.
+        with measure(metrics, "read_json", source):
+            parsed_info = lazy_json.load(source)
     elif source:  # If source passed, read JSON.
-        parsed_info = utils.read_json(filename=source)
+        with measure(metrics, "read_json", source):
+            parsed_info = utils.read_json(filename=source)
     elif parsed_info:  # If parsed_info passed, just use that further on.
         pass
     else:  # Both args are None.
@@ -426,7 +508,11 @@ def generate(module_name: str, parsed_info: dict = None, source: str = None) ->
 
     # If parsed_info is not empty
     if parsed_info:
-        bind_object = bind(root=parsed_info, module_name=module_name)
+        with measure(metrics, "generate", source) as counts:
+            bind_object = bind(
+                root=parsed_info, module_name=module_name, symbol_index=symbol_index
+            )
+            counts["nodes"] = bind_object._node_count
         # Extract filename from parsed_info (TRANSLATION_UNIT's name contains the filepath)
         filename = "pcl" + parsed_info["cursor"]["spelling"].rsplit("pcl")[-1]
         return combine_lines()
@@ -436,10 +522,14 @@ def generate(module_name: str, parsed_info: dict = None, source: str = None) ->
 
 def main():
     args = utils.parse_arguments(script="generate")
+    symbol_index = SymbolIndex(args.symbol_index) if args.symbol_index else None
+    metrics = Metrics() if args.metrics else None
 
     for source in args.files:
         source = utils.get_realpath(path=source)
-        lines_to_write = generate(module_name="pcl", source=source)
+        lines_to_write = generate(
+            module_name="pcl", source=source, symbol_index=symbol_index, metrics=metrics
+        )
         output_dir = utils.join_path(args.pybind11_output_path, "pybind11-gen")
         output_filepath = utils.get_output_path(
             source=source,
@@ -450,6 +540,8 @@ def main():
         out_rel_path = os.path.relpath(output_filepath, args.pybind11_output_path)
         print(f"Producing ./{out_rel_path}")
         utils.write_to_file(filename=output_filepath, linelist=lines_to_write)
+    if metrics is not None:
+        metrics.dump(args.metrics)
 
 
 if __name__ == "__main__":
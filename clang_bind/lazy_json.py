@@ -0,0 +1,219 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+
+from clang_bind.binary_format import MembersView
+from clang_bind.utils import JSONStreamWriter
+
+# Extension appended to the path of a JSON file to get the path of its index
+INDEX_EXTENSION = ".index"
+
+_MAGIC = b"CBJI"
+_VERSION = 2
+# magic, version, node count, size and modification time (ns) of the JSON file
+_header = struct.Struct("<4sIQQQ")
+# start of the node, end of its own keys (before `members`), index following its subtree
+_entry = struct.Struct("<3Q")
+
+
+def get_index_path(filepath):
+    """Returns the path of the index of a JSON file.
+
+    :param filepath: Path of the JSON file
+    :type filepath: str
+    :return: Path of the index
+    :rtype: str
+    """
+    return f"{filepath}{INDEX_EXTENSION}"
+
+
+def dump(filepath, nodes, indent=None):
+    """Writes parsed infos to a JSON file while they are produced, along with an index of the nodes' byte offsets
+    , to load it lazily with :func:`load`.
+
+    :param filepath: Path of the JSON file
+    :type filepath: str
+    :param nodes: (depth, parsed info without `members`) pairs in pre-order
+    , eg: from :meth:`clang_bind.parse.Parse.iter_dicts`
+    :type nodes: iterable
+    :param indent: Indentation, `None` for compact output, defaults to None
+    :type indent: int, optional
+    """
+    # Offsets are counted in characters: newlines must not be translated
+    with open(filepath, "w", newline="\n") as f:
+        writer = JSONStreamWriter(f, indent=indent, index=True)
+        for depth, info in nodes:
+            writer.write(depth, info)
+        writer.close()
+    index = writer.index
+    if sys.byteorder != "little":
+        index.byteswap()
+    with open(get_index_path(filepath), "wb") as f:
+        f.write(
+            _header.pack(
+                _MAGIC,
+                _VERSION,
+                writer.node_count,
+                writer.position,
+                os.stat(filepath).st_mtime_ns,
+            )
+        )
+        f.write(index.tobytes())
+
+
+def is_indexed(filepath):
+    """Returns if a JSON file has an up to date index, written by :func:`dump`.
+
+    :param filepath: Path of the JSON file
+    :type filepath: str
+    :return: True if the file can be loaded with :func:`load`
+    :rtype: bool
+    """
+    try:
+        with open(get_index_path(filepath), "rb") as f:
+            header = f.read(_header.size)
+        stat = os.stat(filepath)
+    except OSError:
+        return False
+    if len(header) != _header.size:
+        return False
+    magic, version, _, json_size, json_mtime_ns = _header.unpack(header)
+    # the JSON file was rewritten since, without an index: its size or at least its modification time differs
+    return (magic, version, json_size, json_mtime_ns) == (
+        _MAGIC,
+        _VERSION,
+        stat.st_size,
+        stat.st_mtime_ns,
+    )
+
+
+class LazyJSONReader:
+    """This is a class which memory-maps a JSON file and its index, to decode nodes only when accessed.
+
+    - Each node's own keys are decoded on first access, its `members` are found from the index without decoding
+    them: subtrees which are not descended into (eg: function bodies) are never decoded.
+
+    :param filepath: Path of the JSON file, indexed by :func:`dump`
+    :type filepath: str
+    """
+
+    def __init__(self, filepath):
+        if not is_indexed(filepath):
+            raise ValueError(f"{filepath} has no up to date index")
+        with open(filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(get_index_path(filepath), "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.node_count = _header.unpack_from(self._index)[2]
+
+    def get_entry(self, index):
+        """Returns the index entry of a node.
+
+        :param index: Index of the node, in pre-order
+        :type index: int
+        :return: (start, end of its own keys, index following its subtree)
+        :rtype: tuple
+        """
+        return _entry.unpack_from(self._index, _header.size + _entry.size * index)
+
+    def get_end(self, index):
+        """Returns the index following the subtree of a node.
+
+        :param index: Index of the node, in pre-order
+        :type index: int
+        :return: Index of the node's next sibling, or of the next node outside its parent
+        :rtype: int
+        """
+        return self.get_entry(index)[2]
+
+    def get_info(self, index):
+        """Decodes the own keys of a node.
+
+        :param index: Index of the node, in pre-order
+        :type index: int
+        :return: Parsed info of the node, without the `members` key
+        :rtype: dict
+        """
+        start, end, _ = self.get_entry(index)
+        return json.loads(self._mmap[start:end] + b"}")
+
+    def get_node(self, index):
+        """Returns a node.
+
+        :param index: Index of the node, in pre-order
+        :type index: int
+        :return: View of the node
+        :rtype: class:`clang_bind.lazy_json.LazyNodeView`
+        """
+        return LazyNodeView(self, index)
+
+    def get_root(self):
+        """Returns the root node.
+
+        :return: View of the root node
+        :rtype: class:`clang_bind.lazy_json.LazyNodeView`
+        """
+        return self.get_node(0)
+
+    def close(self):
+        """Unmaps the files, invalidating the views."""
+        self._mmap.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class LazyNodeView(Mapping):
+    """This is a class which exposes a node of a :class:`LazyJSONReader` as a read-only dict
+    , in the schema consumed by :mod:`clang_bind.generate`.
+
+    :param reader: Reader of the file
+    :type reader: class:`clang_bind.lazy_json.LazyJSONReader`
+    :param index: Index of the node, in pre-order
+    :type index: int
+    """
+
+    __slots__ = ("_reader", "_index", "_info")
+
+    def __init__(self, reader, index):
+        self._reader = reader
+        self._index = index
+        self._info = None  # decoded on first access
+
+    def _get_info(self):
+        if self._info is None:
+            self._info = self._reader.get_info(self._index)
+        return self._info
+
+    def __getitem__(self, key):
+        if key == "members":
+            return MembersView(self._reader, self._index)
+        return self._get_info()[key]
+
+    def __iter__(self):
+        yield from self._get_info()
+        yield "members"
+
+    def __len__(self):
+        return len(self._get_info()) + 1
+
+    def __repr__(self) -> str:
+        return f"LazyNodeView:{self._index}"
+
+
+def load(filepath):
+    """Memory-maps a JSON file written by :func:`dump`, to decode its nodes lazily.
+
+    :param filepath: Path of the JSON file
+    :type filepath: str
+    :return: View of the root node, the file stays mapped while views of it are alive
+    :rtype: class:`clang_bind.lazy_json.LazyNodeView`
+    """
+    return LazyJSONReader(filepath).get_root()
@@ -0,0 +1,97 @@
+# USR of the declarations libclang has no identity for, eg: static assertions
+_EMPTY_USR = "c:"
+# Suffix of the USR of anonymous namespaces
+_ANONYMOUS_NAMESPACE_USR = "@aN"
+# Keys only needed while merging, and members, which references have none of
+_MERGE_KEYS = ("file", "definition", "members")
+
+
+class DeclarationMerger:
+    """This is a class which merges the parsed infos of the translation units of a project
+    , so that declarations shared by several of them (eg: from a common header) are stored once.
+
+    - Parsed infos must come from :meth:`clang_bind.parse.Parse.get_dict` with `merge_info`: declarations are keyed
+    by their USR, cursor kind, declaring file, location and whether they are a definition
+    : (usr, kind, file, line, column, definition). Redeclarations share a USR but not a location, and are kept. A
+    definition is never replaced by a reference to a mere declaration. The `file` and `definition` keys are removed
+    while merging.
+    - Nodes whose USR does not identify a single declaration are never merged, only their members are. These are the
+    nodes without a USR (or without merge info), with the bare `c:` USR (eg: static assertions, friend declarations)
+    and anonymous namespaces, whose USR is the same in every file.
+    - The first translation unit merged with a declaration owns it. The later ones keep a reference in its place
+    : a node without members, with a `reference` key holding the owning file.
+    """
+
+    def __init__(self):
+        self.declarations = {}  # {key: owning file}
+
+    @staticmethod
+    def get_key(info):
+        """Returns the key of a declaration, `None` for nodes without a USR (statements, references, etc.), without
+        merge info or whose USR does not identify a single declaration.
+
+        :param info: Parsed info as returned by :meth:`clang_bind.parse.Parse.get_dict` with `merge_info`
+        :type info: dict
+        :return: (usr, kind, file, line, column, definition)
+        :rtype: tuple
+        """
+        usr = info.get("usr")
+        if (
+            not usr
+            or "file" not in info
+            or usr == _EMPTY_USR
+            or usr.endswith(_ANONYMOUS_NAMESPACE_USR)
+        ):
+            return None
+        return (
+            usr,
+            info["cursor_kind"]["name"],
+            info["file"],
+            info["line"],
+            info["column"],
+            info["definition"],
+        )
+
+    @staticmethod
+    def get_reference(info, file):
+        """Returns the reference replacing a declaration owned by another translation unit.
+
+        :param info: Parsed info of the declaration
+        :type info: dict
+        :param file: Owning file
+        :type file: str
+        :return: Parsed info of the reference
+        :rtype: dict
+        """
+        reference = {
+            key: value for key, value in info.items() if key not in _MERGE_KEYS
+        }
+        reference["members"] = []
+        reference["reference"] = file
+        return reference
+
+    def merge(self, file, parsed_info):
+        """Merges the parsed infos of a translation unit, replacing (in place) the declarations already owned by
+        another one with references.
+
+        :param file: Parsed file
+        :type file: str
+        :param parsed_info: Parsed infos as returned by :meth:`clang_bind.parse.Parse.get_dict` with `merge_info`
+        :type parsed_info: dict
+        :return: The merged parsed infos
+        :rtype: dict
+        """
+        stack = [parsed_info]
+        while stack:
+            members = stack.pop()["members"]
+            for i, member in enumerate(members):
+                key = self.get_key(member)
+                member.pop("file", None)
+                member.pop("definition", None)
+                if key is not None:
+                    owner = self.declarations.setdefault(key, file)
+                    if owner != file:
+                        members[i] = self.get_reference(member, owner)
+                        continue
+                stack.append(member)
+        return parsed_info
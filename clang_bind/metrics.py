@@ -0,0 +1,181 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import clang_bind.utils as utils
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# CPU time of the calling thread, of the whole process before Python 3.7
+_get_cpu_time = getattr(time, "thread_time", time.process_time)
+
+
+def get_process_peak_rss():
+    """Returns the peak resident set size of the process since it started, not of a stage or file.
+
+    :return: Peak RSS in bytes, `None` if it can not be measured on this platform
+    :rtype: int
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+@contextmanager
+def _no_measure():
+    yield {"nodes": 0}
+
+
+def measure(metrics, stage, file=None):
+    """Measures the enclosed block with the metrics, if any: `with measure(metrics, "stage") as counts:`.
+
+    :param metrics: Metrics to record the measurement in, `None` to not measure
+    :type metrics: class:`clang_bind.metrics.Metrics`
+    :param stage: Name of the stage
+    :type stage: str
+    :param file: File the stage runs on, defaults to None
+    :type file: str, optional
+    :return: Context manager yielding a dict to set the number of processed nodes in, under the `nodes` key
+    """
+    if metrics is None:
+        return _no_measure()
+    return metrics.measure(stage, file)
+
+
+class Metrics:
+    """This is a class which records performance metrics per stage (eg: `parse`, `construct_tree`) and per file.
+
+    - Each measurement of a stage adds its wall time, CPU time (of the measuring thread) and node count
+    to the stage's record for the file.
+    - Records also hold `process_peak_rss`: the peak RSS of the process which ran the stage, since the process
+    started. It is a high-water mark of the whole process, not a measurement of the stage or file: once a large
+    file was parsed, it is the same in every later record of the process (and of the threads sharing it).
+    - Records are plain data, records measured in worker processes can be merged into the main process' metrics.
+    - Measuring from several threads is safe.
+    """
+
+    def __init__(self):
+        self._records = {}  # {(stage, file): record}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, stage, file=None):
+        """Measures the enclosed block as a run of the stage.
+
+        :param stage: Name of the stage
+        :type stage: str
+        :param file: File the stage runs on, defaults to None
+        :type file: str, optional
+        :return: A dict to set the number of processed nodes in, under the `nodes` key
+        :rtype: dict
+        """
+        counts = {"nodes": 0}
+        start_wall_time, start_cpu_time = time.perf_counter(), _get_cpu_time()
+        try:
+            yield counts
+        finally:
+            self.add(
+                {
+                    "stage": stage,
+                    "file": file,
+                    "calls": 1,
+                    "wall_time": time.perf_counter() - start_wall_time,
+                    "cpu_time": _get_cpu_time() - start_cpu_time,
+                    "nodes": counts["nodes"],
+                    "process_peak_rss": get_process_peak_rss(),
+                }
+            )
+
+    def add(self, record):
+        """Adds a record to the record of its stage and file.
+
+        :param record: {"stage", "file", "calls", "wall_time", "cpu_time", "nodes", "process_peak_rss"}
+        :type record: dict
+        """
+        key = (record["stage"], record["file"])
+        with self._lock:
+            current = self._records.get(key)
+            if current is None:
+                self._records[key] = dict(record)
+                return
+            for name in ("calls", "wall_time", "cpu_time", "nodes"):
+                current[name] += record[name]
+            if record["process_peak_rss"] is not None:
+                current["process_peak_rss"] = max(
+                    current["process_peak_rss"] or 0, record["process_peak_rss"]
+                )
+
+    def merge(self, records):
+        """Adds records, eg: as returned by :meth:`get_records` in a worker process.
+
+        :param records: Records to add
+        :type records: list
+        """
+        for record in records:
+            self.add(record)
+
+    @staticmethod
+    def _with_rates(record):
+        record = dict(record)
+        record["nodes_per_second"] = (
+            record["nodes"] / record["wall_time"] if record["wall_time"] else None
+        )
+        return record
+
+    def get_records(self):
+        """Returns the records per stage and file.
+
+        :return: Records: {"stage", "file", "calls", "wall_time", "cpu_time", "nodes", "nodes_per_second", "process_peak_rss"}
+        :rtype: list
+        """
+        with self._lock:
+            records = [dict(record) for record in self._records.values()]
+        return [self._with_rates(record) for record in records]
+
+    def get_stages(self):
+        """Returns the records per stage, summed over the files.
+
+        :return: Records: {"stage", "calls", "wall_time", "cpu_time", "nodes", "nodes_per_second", "process_peak_rss"}
+        :rtype: list
+        """
+        stages = Metrics()
+        for record in self.get_records():
+            stages.add({**record, "file": None})
+        records = stages.get_records()
+        for record in records:
+            del record["file"]
+        return records
+
+    def get_process_peak_rss(self):
+        """Returns the highest peak RSS of the processes which ran the stages, eg: the worker processes.
+
+        :return: Peak RSS in bytes, `None` if it could not be measured
+        :rtype: int
+        """
+        peak_rss = [
+            record["process_peak_rss"]
+            for record in self.get_records()
+            if record["process_peak_rss"] is not None
+        ]
+        return max(peak_rss, default=None)
+
+    def get_dict(self):
+        return {
+            "process_peak_rss": self.get_process_peak_rss(),
+            "stages": self.get_stages(),
+            "files": self.get_records(),
+        }
+
+    def dump(self, filepath):
+        """Exports the metrics as JSON.
+
+        :param filepath: Path of the output file
+        :type filepath: str
+        """
+        utils.dump_json(filepath=filepath, info=self.get_dict())
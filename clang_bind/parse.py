@@ -1,30 +1,839 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+from functools import lru_cache
+from ctypes import byref, c_void_p, cast
+
 import clang.cindex as clang
 from treelib import Tree
 
-from clang_bind.clang_utils import ClangUtils
+import clang_bind.utils as utils
+from clang_bind.clang_utils import ClangUtils, get_reflection_plan
+from clang_bind.compact_tree import CompactTree
+from clang_bind.metrics import measure
+
+# Return values of a `clang_visitChildren` visitor: `CXChildVisitResult`
+CHILD_VISIT_BREAK, CHILD_VISIT_CONTINUE, CHILD_VISIT_RECURSE = range(3)
+
+
+# Additional information of the cursor kinds, a finite enum: {cursor kind id: info}
+_cursor_kind_infos = {}
+
+# Value of the additional information whose getter raised an exception
+_MISSING = object()
+
+
+@lru_cache(maxsize=None)
+def _get_getters(cls):
+    """Returns the getters of the additional information of a class' objects, keyed as in
+    :meth:`clang_bind.clang_utils.ClangUtils.get_all_functions_dict`.
+
+    :param cls: The class of the objects, eg: `clang.cindex.Cursor`
+    :type cls: type
+    :return: {function/property name: function}
+    :rtype: dict
+    """
+    getters = {}
+    for functions in get_reflection_plan(cls):
+        getters.update(functions)
+    return getters
+
+
+class LazyVerboseInfo(Mapping):
+    """This is a class which exposes the additional information of an object as a read-only dict
+    , calling the `is_` method, `get_` method or @property getter of each key on its first access only.
+
+    - Keys whose getter raises an exception are missing, as in
+    :meth:`clang_bind.clang_utils.ClangUtils.get_all_functions_dict`: iterating calls all the getters.
+
+    :param object: An object of :class:`clang.cindex.Cursor`
+    :type object: class:`clang.cindex.Cursor`
+    :param metrics: Metrics to record the calls of the getters in, defaults to None
+    :type metrics: class:`clang_bind.metrics.Metrics`, optional
+    """
+
+    __slots__ = ("_object", "_metrics", "_getters", "_values")
+
+    def __init__(self, object, metrics=None):
+        self._object = object
+        self._metrics = metrics
+        self._getters = _get_getters(type(object))
+        # {function/property name: value or `_MISSING`}, filled on access
+        self._values = {}
+
+    def __getitem__(self, key):
+        value = self._values.get(key)
+        if value is None and key not in self._values:
+            getter = self._getters[key]
+            with measure(self._metrics, "reflection"):
+                try:  # cindex.py's (property) functions raise exceptions internally
+                    value = getter(self._object)
+                except Exception:
+                    value = _MISSING
+            self._values[key] = value
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (key for key in self._getters if key in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"LazyVerboseInfo:{self._object.kind.name}:'{self._object.spelling}'"
+
+
+class TypeTable:
+    """This is a class which interns the additional information of the types of a translation unit
+    , so that it is computed and stored once per distinct type instead of once per cursor.
+
+    - Types are keyed by identity: their kind and `QualType` pointer, which libclang uniques per translation unit.
+    Sugared types (eg: typedefs) are distinct from their canonical types, their information differs.
+    - Entries are referred to by integer identifiers, in the order they were added.
+    """
+
+    def __init__(self):
+        self._ids = {}  # {(type kind id, `QualType` pointer): type identifier}
+        self.infos = []  # additional information, indexed by type identifier
+
+    def __len__(self):
+        return len(self.infos)
+
+    @staticmethod
+    def get_key(type):
+        return (type._kind_id, type.data[0])
+
+    def get_id(self, type, get_info):
+        """Returns the identifier of the type, adding its information if needed.
+
+        :param type: An object of :class:`clang.cindex.Type`
+        :type type: class:`clang.cindex.Type`
+        :param get_info: Function computing the information of a new type, from the type
+        :type get_info: function
+        :return: Type identifier
+        :rtype: int
+        """
+        key = self.get_key(type)
+        type_id = self._ids.get(key)
+        if type_id is None:
+            self.infos.append(get_info(type))
+            type_id = self._ids[key] = len(self.infos) - 1
+        return type_id
 
 
 class ParsedInfo:
     """This is a data holder class containing parsed info, to be used while constructing the tree.
 
+    - The additional information of verbose mode is computed on first access of each attribute
+    (`cursor_kind_info`, `cursor_info`, `type_info`), then cached. The values of `cursor_info` are themselves
+    computed on first access of each key, see :class:`clang_bind.parse.LazyVerboseInfo`.
+    - The information of cursor kinds and types is shared: per cursor kind, and per type in the type table
+    , so it must not be modified.
+
     :param cursor: An object of :class:`clang.cindex.Cursor`
     :type cursor: class:`clang.cindex.Cursor`
     :param verbose: Add additional information about the cursor, defaults to False
     :type verbose: bool, optional
+    :param node_id: Identifier of the tree node holding the parsed info, defaults to None
+    :type node_id: `treelib.Tree.identifier` or int, optional
+    :param metrics: Metrics to record the computation of the additional information in, defaults to None
+    :type metrics: class:`clang_bind.metrics.Metrics`, optional
+    :param type_table: Type table of the translation unit, defaults to None: a table of its own
+    :type type_table: class:`clang_bind.parse.TypeTable`, optional
     """
 
-    def __init__(self, cursor, verbose=False):
+    __slots__ = (
+        "cursor",
+        "node_id",
+        "verbose",
+        "metrics",
+        "type_table",
+        "_cursor_info",
+        "_type_id",
+    )
+
+    def __init__(
+        self, cursor, verbose=False, node_id=None, metrics=None, type_table=None
+    ):
         self.cursor = cursor
-        if verbose:
-            # Add additional information about the cursor
-            # Get values from the classes in cindex.py: `is_` methods, `get_` methods, @property values
-            self.cursor_kind = ClangUtils(cursor.kind).get_all_functions_dict()
-            self.cursor = ClangUtils(cursor).get_all_functions_dict()
-            self.type = ClangUtils(cursor.type).get_all_functions_dict()
+        self.node_id = node_id
+        self.verbose = verbose
+        self.metrics = metrics
+        self.type_table = type_table
+        self._cursor_info = None
+        self._type_id = None
+
+    def _check_verbose(self):
+        if not self.verbose:
+            raise AttributeError(
+                "Additional information is only available in verbose mode"
+            )
+
+    def _get_verbose_info(self, object):
+        """Returns additional information about the object
+        , the values from the classes in cindex.py: `is_` methods, `get_` methods, @property values
+
+        :param object: An object of :class:`clang.cindex.CursorKind`, :class:`clang.cindex.Cursor`
+        or :class:`clang.cindex.Type`
+        :type object: class:`clang.cindex.CursorKind`, class:`clang.cindex.Cursor` or class:`clang.cindex.Type`
+        :return: Additional information: {function/property name: value}
+        :rtype: dict
+        """
+        self._check_verbose()
+        with measure(self.metrics, "reflection"):
+            return ClangUtils(object).get_all_functions_dict()
+
+    @property
+    def cursor_kind_info(self):
+        info = _cursor_kind_infos.get(self.cursor._kind_id)
+        if info is None:
+            info = _cursor_kind_infos[self.cursor._kind_id] = self._get_verbose_info(
+                self.cursor.kind
+            )
+        else:
+            self._check_verbose()
+        return info
+
+    @property
+    def cursor_info(self):
+        if self._cursor_info is None:
+            self._check_verbose()
+            self._cursor_info = LazyVerboseInfo(self.cursor, self.metrics)
+        return self._cursor_info
+
+    @property
+    def type_id(self):
+        """Identifier of the cursor's type in the type table."""
+        if self._type_id is None:
+            self._check_verbose()
+            if self.type_table is None:
+                self.type_table = TypeTable()
+            self._type_id = self.type_table.get_id(
+                self.cursor.type, self._get_verbose_info
+            )
+        return self._type_id
+
+    @property
+    def type_info(self):
+        type_id = self.type_id
+        return self.type_table.infos[type_id]
 
     def __repr__(self) -> str:
         return f"{self.cursor.kind.name}:'{self.cursor.spelling}'"
 
+    def get_dict(self, depth=0, merge_info=False):
+        """Returns the parsed info as a dict, in the schema consumed by :mod:`clang_bind.generate`.
+
+        - `usr` and `referenced_usr` are only set when not empty: most nodes are neither declarations nor references.
+
+        :param depth: Depth of the node in the tree, defaults to 0
+        :type depth: int, optional
+        :param merge_info: Add the information :class:`clang_bind.merge.DeclarationMerger` keys declarations with
+        to the nodes with a USR: the declaring `file`, and whether it is a `definition`, defaults to False
+        :type merge_info: bool, optional
+        :return: Parsed info, without the `members` key
+        :rtype: dict
+        """
+        location = self.cursor.location
+        info = {
+            "depth": depth,
+            "line": location.line,
+            "column": location.column,
+            "cursor_kind": {"name": self.cursor.kind.name},
+            "cursor": {"spelling": self.cursor.spelling},
+            "type": {"kind": self.cursor.type.kind.spelling},
+        }
+        usr = get_usr(self.cursor)
+        if usr:
+            info["usr"] = usr
+            if merge_info:
+                info["file"] = location.file.name if location.file else ""
+                info["definition"] = self.cursor.is_definition()
+        referenced_usr = get_referenced_usr(self.cursor)
+        if referenced_usr:
+            info["referenced_usr"] = referenced_usr
+        return info
+
+
+@lru_cache(maxsize=None)
+def _has_usr(kind_id):
+    """Returns if the cursors of the kind can have a USR: declarations and macro definitions."""
+    kind = clang.CursorKind.from_id(kind_id)
+    return kind.is_declaration() or kind == clang.CursorKind.MACRO_DEFINITION
+
+
+def get_usr(cursor):
+    """Returns the USR of the cursor, without asking libclang for the kinds which have none (statements, etc.).
+
+    :param cursor: An object of :class:`clang.cindex.Cursor`
+    :type cursor: class:`clang.cindex.Cursor`
+    :return: USR of the cursor, empty if it has none
+    :rtype: str
+    """
+    return cursor.get_usr() if _has_usr(cursor._kind_id) else ""
+
+
+def get_referenced_usr(cursor):
+    """Returns the USR of the declaration referred to by the cursor, eg: by a `TYPE_REF`.
+
+    :param cursor: An object of :class:`clang.cindex.Cursor`
+    :type cursor: class:`clang.cindex.Cursor`
+    :return: USR of the referred declaration, empty if the cursor is not a reference
+    :rtype: str
+    """
+    referenced = None
+    if cursor.kind.is_reference() or cursor.kind == clang.CursorKind.CXX_BASE_SPECIFIER:
+        referenced = cursor.referenced
+    return referenced.get_usr() if referenced else ""
+
+
+class CursorView(Mapping):
+    """This is a class which exposes a node of a parsed tree as a read-only dict
+    , in the schema consumed by :mod:`clang_bind.generate`, to generate without serializing the tree.
+
+    - Values are computed from the live cursor on access, nothing is copied.
+    - Views are only valid while the parse (and its translation unit) is alive and not reparsed.
+
+    :param parser: Parser of the tree
+    :type parser: class:`clang_bind.parse.Parse`
+    :param node_id: Node identifier of the node
+    :type node_id: `treelib.Tree.identifier` or int
+    :param depth: Depth of the node in the tree, defaults to 0
+    :type depth: int, optional
+    """
+
+    __slots__ = ("_parser", "_node_id", "_depth", "_cursor")
+    _keys = ("depth", "line", "column", "cursor_kind", "cursor", "type", "members")
+    # Keys only set when not empty, as by :meth:`clang_bind.parse.ParsedInfo.get_dict`
+    _optional_keys = {"usr": get_usr, "referenced_usr": get_referenced_usr}
+
+    def __init__(self, parser, node_id, depth=0):
+        self._parser = parser
+        self._node_id = node_id
+        self._depth = depth
+        self._cursor = parser.get_parsed_info_from_node_id(node_id).cursor
+
+    def __getitem__(self, key):
+        cursor = self._cursor
+        if key == "depth":
+            return self._depth
+        if key == "line":
+            return cursor.location.line
+        if key == "column":
+            return cursor.location.column
+        if key == "cursor_kind":
+            return {"name": cursor.kind.name}
+        if key == "cursor":
+            return {"spelling": cursor.spelling}
+        if key == "type":
+            return {"kind": cursor.type.kind.spelling}
+        if key in self._optional_keys:
+            value = self._optional_keys[key](cursor)
+            if not value:
+                raise KeyError(key)
+            return value
+        if key == "members":
+            return [
+                CursorView(self._parser, child_id, self._depth + 1)
+                for child_id in self._parser.tree.is_branch(self._node_id)
+            ]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self._keys
+        yield from (key for key in self._optional_keys if key in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"CursorView:{self._node_id}"
+
+
+class ParseSession:
+    """This is a class which owns an index and keeps the translation units parsed with it alive
+    , so that parsing the same file again does not pay the full parse cost.
+
+    - Translation units are kept in a bounded LRU, keyed by (path, compiler arguments, options).
+    - A cached translation unit is reparsed when the file, or any file it includes, was modified since
+      , or when it is parsed from source text which changed since.
+      Reparsing invalidates the cursors of trees previously built from that translation unit.
+    - A session is not thread safe, use one session per thread.
+
+    :param max_translation_units: Maximum number of translation units kept alive, defaults to 16
+    :type max_translation_units: int, optional
+    """
+
+    def __init__(self, max_translation_units=16):
+        self.index = clang.Index.create()
+        self.max_translation_units = max_translation_units
+        # {(path, compiler arguments, options): (translation unit, {path: modification time}, source)}
+        self._translation_units = OrderedDict()
+
+    @staticmethod
+    def _get_modification_times(translation_unit):
+        """Returns the modification times of the files making up the translation unit.
+
+        :param translation_unit: An object of :class:`clang.cindex.TranslationUnit`
+        :type translation_unit: class:`clang.cindex.TranslationUnit`
+        :return: Modification times: {path: modification time}
+        :rtype: dict
+        """
+        paths = [translation_unit.spelling] + [
+            inclusion.include.name for inclusion in translation_unit.get_includes()
+        ]
+        return {
+            path: os.path.getmtime(path) if os.path.exists(path) else None
+            for path in paths
+        }
+
+    def get_translation_unit(
+        self,
+        file,
+        compiler_arguments=[],
+        options=clang.TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD,
+        source=None,
+    ):
+        """Returns the translation unit of the file, parsing or reparsing it only if required.
+
+        :param file: File to parse, a virtual filename if `source` is given
+        :type file: str
+        :param compiler_arguments: Compiler arguments to use while parsing
+        :type compiler_arguments: list, optional
+        :param options: Parse options, a bitwise or of `clang.cindex.TranslationUnit.PARSE_*` flags
+        :type options: int, optional
+        :param source: Source text to parse instead of the file's contents, via libclang's unsaved files
+        , defaults to None: read the file
+        :type source: str, optional
+        :return: The translation unit
+        :rtype: class:`clang.cindex.TranslationUnit`
+        """
+        key = (file, tuple(compiler_arguments), options)
+        unsaved_files = None if source is None else [(file, source)]
+        if key in self._translation_units:
+            (
+                translation_unit,
+                modification_times,
+                parsed_source,
+            ) = self._translation_units.pop(key)
+            if parsed_source != source or any(
+                (os.path.getmtime(path) if os.path.exists(path) else None)
+                != modification_time
+                for path, modification_time in modification_times.items()
+            ):
+                translation_unit.reparse(unsaved_files=unsaved_files)
+                modification_times = self._get_modification_times(translation_unit)
+        else:
+            translation_unit = self.index.parse(
+                path=file,
+                args=compiler_arguments,
+                unsaved_files=unsaved_files,
+                options=options,
+            )
+            modification_times = self._get_modification_times(translation_unit)
+
+        self._translation_units[key] = (translation_unit, modification_times, source)
+        while len(self._translation_units) > self.max_translation_units:
+            self._translation_units.popitem(last=False)  # evict the least recently used
+        return translation_unit
+
+
+class PrecompiledHeaders:
+    """This is a class which precompiles headers shared by many translation units
+    , once per distinct set of compiler arguments, and reuses the precompiled header for every translation unit
+    parsed with that set.
+
+    - The precompiled header is passed via `-include-pch`, the translation units' own inclusions of the headers
+    are then skipped by their include guards.
+    - If a precompiled header cannot be built, translation units are parsed without it.
+    - The inputs of each precompiled header (its prefix header and the files it includes) are recorded next to it
+    , with their modification times, sizes and contents hashes. A precompiled header left by a previous run is reused
+    while its inputs are unchanged, instead of being rebuilt by every process.
+
+    :param headers: Headers to precompile, as written in an `#include` directive, eg: `pcl/point_types.h`
+    :type headers: list
+    :param output_dir: Directory to write the precompiled headers to
+    :type output_dir: str
+    """
+
+    # Arguments (and the number of values they take) irrelevant to the parsed code
+    _ignored_arguments = {
+        "-c": 0,
+        "-o": 1,
+        "-MD": 0,
+        "-MMD": 0,
+        "-MF": 1,
+        "-MT": 1,
+        "-MQ": 1,
+    }
+
+    def __init__(self, headers, output_dir):
+        self.headers = list(headers)
+        self.output_dir = output_dir
+        self.errors = {}  # {precompiled header path: error}
+        self._precompiled_headers = {}  # {key: precompiled header path or None}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_shared_compiler_arguments(cls, compiler_arguments):
+        """Returns the compiler arguments without the ones specific to a translation unit (output files, etc.).
+
+        :param compiler_arguments: Compiler arguments of a translation unit
+        :type compiler_arguments: list
+        :return: Compiler arguments which can be shared by translation units
+        :rtype: list
+        """
+        shared_compiler_arguments = []
+        arguments = iter(compiler_arguments)
+        for argument in arguments:
+            if argument in cls._ignored_arguments:
+                for _ in range(cls._ignored_arguments[argument]):
+                    next(arguments, None)
+            elif not argument.startswith("-o"):
+                shared_compiler_arguments.append(argument)
+        return shared_compiler_arguments
+
+    @staticmethod
+    def _get_input_state(path):
+        """Returns the state of an input of a precompiled header, as recorded next to it.
+
+        :param path: Path of the input
+        :type path: str
+        :return: {"mtime": int, "size": int, "hash": str}, `None` if the file does not exist
+        :rtype: dict
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": utils.get_file_hash(path),
+        }
+
+    @staticmethod
+    def _read_inputs(path):
+        """Returns the inputs recorded next to a precompiled header.
+
+        :param path: Path of the precompiled header
+        :type path: str
+        :return: {input path: state}, `None` if none are recorded
+        :rtype: dict
+        """
+        try:
+            with open(f"{path}.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def get_inputs(cls, path):
+        """Returns the files a precompiled header was built from: its prefix header and the files it includes
+        , eg: to depend on them rather than on the precompiled header, whose contents differ on every build.
+
+        :param path: Path of the precompiled header
+        :type path: str
+        :return: Paths of the inputs, empty if none are recorded
+        :rtype: list
+        """
+        return sorted(cls._read_inputs(path) or ())
+
+    def _is_up_to_date(self, path):
+        """Returns if the precompiled header exists and none of its inputs changed since it was built.
+
+        :param path: Path of the precompiled header
+        :type path: str
+        :return: True if the precompiled header can be reused
+        :rtype: bool
+        """
+        inputs = self._read_inputs(path)
+        return (
+            inputs is not None
+            and os.path.exists(path)
+            and all(
+                self._get_input_state(input_path) == state
+                for input_path, state in inputs.items()
+            )
+        )
+
+    def _build(self, compiler_arguments, path, index):
+        """Builds the precompiled header at `path`.
+
+        :param compiler_arguments: Shared compiler arguments to build with
+        :type compiler_arguments: list
+        :param path: Path of the precompiled header
+        :type path: str
+        :param index: An object of :class:`clang.cindex.Index` to parse with
+        :type index: class:`clang.cindex.Index`
+        :return: `path` if the precompiled header was built, else `None`
+        :rtype: str
+        """
+        prefix_header = f"{path}.hpp"
+        with open(prefix_header, "w") as f:
+            f.writelines(f"#include <{header}>\n" for header in self.headers)
+        try:
+            translation_unit = index.parse(
+                path=prefix_header,
+                args=compiler_arguments + ["-x", "c++-header"],
+                options=clang.TranslationUnit.PARSE_INCOMPLETE,
+            )
+            errors = [
+                str(diagnostic)
+                for diagnostic in translation_unit.diagnostics
+                if diagnostic.severity >= clang.Diagnostic.Error
+            ]
+            # A precompiled header with errors would fail every translation unit
+            if errors:
+                raise clang.TranslationUnitLoadError("\n".join(errors))
+            translation_unit.save(path)
+        except (clang.TranslationUnitLoadError, clang.TranslationUnitSaveError) as e:
+            self.errors[path] = str(e)
+            os.remove(prefix_header)
+            return None
+        inputs = {os.path.abspath(prefix_header)} | {
+            os.path.abspath(inclusion.include.name)
+            for inclusion in translation_unit.get_includes()
+        }
+        tmp_path = f"{path}.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    input_path: self._get_input_state(input_path)
+                    for input_path in inputs
+                },
+                f,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, f"{path}.json")
+        return path
+
+    def get_compiler_arguments(self, compiler_arguments, index=None):
+        """Returns the compiler arguments to parse a translation unit with the precompiled header
+        , building the precompiled header on first use of this set of arguments unless an up-to-date one exists.
+
+        :param compiler_arguments: Compiler arguments of the translation unit
+        :type compiler_arguments: list
+        :param index: Index to build the precompiled header with, defaults to None: create a new one
+        :type index: class:`clang.cindex.Index`, optional
+        :return: Compiler arguments using the precompiled header
+        :rtype: list
+        """
+        shared_compiler_arguments = self.get_shared_compiler_arguments(
+            compiler_arguments
+        )
+        key = hashlib.sha1(
+            "\0".join(self.headers + ["--"] + shared_compiler_arguments).encode()
+        ).hexdigest()
+        with self._lock:
+            if key not in self._precompiled_headers:
+                path = os.path.join(self.output_dir, f"{key}.pch")
+                if self._is_up_to_date(path):
+                    self._precompiled_headers[key] = path
+                else:
+                    os.makedirs(self.output_dir, exist_ok=True)
+                    self._precompiled_headers[key] = self._build(
+                        compiler_arguments=shared_compiler_arguments,
+                        path=path,
+                        index=index or clang.Index.create(),
+                    )
+            path = self._precompiled_headers[key]
+        if path is None:
+            return list(compiler_arguments)
+        return list(compiler_arguments) + ["-include-pch", path]
+
+
+def get_translation_unit(
+    file,
+    compiler_arguments=[],
+    session=None,
+    precompiled_headers=None,
+    declarations_only=False,
+    incomplete=False,
+    source=None,
+):
+    """Parses a file into a translation unit.
+
+    :param file: File to parse, a virtual filename if `source` is given
+    :type file: str
+    :param compiler_arguments: Compiler arguments to use while parsing
+    :type compiler_arguments: list, optional
+    :param session: Session to parse with, defaults to None: create a new one
+    :type session: class:`clang_bind.parse.ParseSession`, optional
+    :param precompiled_headers: Precompiled headers to parse with, defaults to None
+    :type precompiled_headers: class:`clang_bind.parse.PrecompiledHeaders`, optional
+    :param declarations_only: Skip function bodies, defaults to False
+    :type declarations_only: bool, optional
+    :param incomplete: Parse as an incomplete translation unit (eg: a header), defaults to False
+    :type incomplete: bool, optional
+    :param source: Source text to parse instead of the file's contents, defaults to None: read the file
+    :type source: str, optional
+    :return: The translation unit
+    :rtype: class:`clang.cindex.TranslationUnit`
+    """
+    if session is None:
+        session = ParseSession()
+    if precompiled_headers is not None:
+        compiler_arguments = precompiled_headers.get_compiler_arguments(
+            compiler_arguments, index=session.index
+        )
+    """
+    - Why parse using the option `PARSE_DETAILED_PROCESSING_RECORD`?
+        - Indicates that the parser should construct a detailed preprocessing record, 
+        including all macro definitions and instantiations
+        - Required to retrieve `CursorKind.INCLUSION_DIRECTIVE`
+    - Why parse using the option `PARSE_SKIP_FUNCTION_BODIES` for `declarations_only`?
+        - Bindings are generated from declarations only, function bodies are never used
+    """
+    options = clang.TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD
+    if declarations_only:
+        options |= clang.TranslationUnit.PARSE_SKIP_FUNCTION_BODIES
+    if incomplete:
+        options |= clang.TranslationUnit.PARSE_INCOMPLETE
+    return session.get_translation_unit(
+        file=file,
+        compiler_arguments=compiler_arguments,
+        options=options,
+        source=source,
+    )
+
+
+class CursorFilter:
+    """This is a class which decides which cursors of a translation unit make it into the tree.
+
+    - Ownership is decided per file (`CXFile`) of the translation unit, not per cursor
+    : a cursor's file is fetched without creating intermediate objects, and the ownership of each file is
+    computed from its name only once.
+    - Kinds are checked first, against sets of kind ids. Rejected cursors are pruned with their subtrees.
+
+    :param filename: File the cursors should belong in
+    :type filename: str
+    :param declarations_only: Reject statements and expressions, defaults to False
+    :type declarations_only: bool, optional
+    :param owned_files: Other files (or directories, for all files under them) the cursors can belong in
+    , defaults to None
+    :type owned_files: list, optional
+    :param allowed_kinds: Only accept the cursors of these kinds, defaults to None: accept all kinds
+    :type allowed_kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
+    :param ignored_kinds: Reject the cursors of these kinds, defaults to None
+    :type ignored_kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
+    """
+
+    def __init__(
+        self,
+        filename,
+        declarations_only=False,
+        owned_files=None,
+        allowed_kinds=None,
+        ignored_kinds=None,
+    ):
+        self.filename = filename
+        self.declarations_only = declarations_only
+        self.allowed_kind_ids = (
+            None if allowed_kinds is None else self.get_kind_ids(allowed_kinds)
+        )
+        self.ignored_kind_ids = self.get_kind_ids(ignored_kinds or [])
+        if declarations_only:
+            self.ignored_kind_ids |= self.get_statement_and_expression_kind_ids()
+        self.owned_files = set()
+        self.owned_dirs = []
+        for path in owned_files or []:
+            path = os.path.realpath(path)
+            if os.path.isdir(path):
+                self.owned_dirs.append(os.path.join(path, ""))
+            else:
+                self.owned_files.add(path)
+        self._file_ownership = {None: False}  # {`CXFile` pointer: is owned}
+
+    @staticmethod
+    def get_kind_ids(kinds):
+        """Returns the ids of the cursor kinds.
+
+        :param kinds: Cursor kinds, or their names, eg: `CXX_METHOD`
+        :type kinds: iterable of class:`clang.cindex.CursorKind` or str
+        :return: Cursor kind ids
+        :rtype: set
+        """
+        return {
+            (getattr(clang.CursorKind, kind) if isinstance(kind, str) else kind).value
+            for kind in kinds
+        }
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_statement_and_expression_kind_ids():
+        return frozenset(
+            kind.value
+            for kind in clang.CursorKind.get_all_kinds()
+            if kind.is_statement() or kind.is_expression()
+        )
+
+    @staticmethod
+    def get_file_pointer(cursor):
+        """Returns the identity of the file the cursor is located in.
+
+        :param cursor: An object of :class:`clang.cindex.Cursor`
+        :type cursor: class:`clang.cindex.Cursor`
+        :return: The `CXFile` pointer, `None` if the cursor is not located in a file
+        :rtype: int
+        """
+        file = clang.c_object_p()
+        clang.conf.lib.clang_getInstantiationLocation(
+            clang.conf.lib.clang_getCursorLocation(cursor),
+            byref(file),
+            None,
+            None,
+            None,
+        )
+        return cast(file, c_void_p).value
+
+    def is_owned_file(self, filename):
+        """Checks if the file is owned.
+
+        :param filename: Filename to check
+        :type filename: str
+        :return: `True` if file is owned, else `False`
+        :rtype: bool
+        """
+        if filename == self.filename:
+            return True
+        if not (self.owned_files or self.owned_dirs):
+            return False
+        path = os.path.realpath(filename)
+        return path in self.owned_files or any(
+            path.startswith(owned_dir) for owned_dir in self.owned_dirs
+        )
+
+    def is_valid(self, cursor):
+        """Checks if the cursor is valid (cursor should be of an accepted kind, which excludes statements and
+        expressions when keeping declarations only, and be in an owned file).
+
+        :param cursor: The cursor to check, an object of :class:`clang.cindex.Cursor`
+        :type cursor: class:`clang.cindex.Cursor`
+        :return: `True` if cursor is valid, else `False`
+        :rtype: bool
+        """
+        kind_id = cursor._kind_id
+        if kind_id in self.ignored_kind_ids or (
+            self.allowed_kind_ids is not None and kind_id not in self.allowed_kind_ids
+        ):
+            return False
+        file_pointer = self.get_file_pointer(cursor)
+        is_owned = self._file_ownership.get(file_pointer)
+        if is_owned is None:  # first cursor of this file
+            is_owned = self._file_ownership[file_pointer] = self.is_owned_file(
+                cursor.location.file.name
+            )
+        return is_owned
+
 
 class Parse:
     """This is a class which parses a file and generate an abstract syntax tree from it.
@@ -33,28 +842,84 @@ class Parse:
     :type file: str
     :param compiler_arguments: Compiler arguments to use while parsing
     :type compiler_arguments: list, optional
+    :param session: Session to parse with, defaults to None: create a new one
+    :type session: class:`clang_bind.parse.ParseSession`, optional
+    :param precompiled_headers: Precompiled headers to parse with, defaults to None
+    :type precompiled_headers: class:`clang_bind.parse.PrecompiledHeaders`, optional
+    :param declarations_only: Skip function bodies, statements and expressions, defaults to False
+    :type declarations_only: bool, optional
+    :param incomplete: Parse as an incomplete translation unit (eg: a header), defaults to False
+    :type incomplete: bool, optional
+    :param compact: Store the tree in a :class:`clang_bind.compact_tree.CompactTree` instead of
+    a :class:`treelib.Tree`, parsed infos are then created on demand, defaults to False
+    :type compact: bool, optional
+    :param verbose: Add additional information about the cursors to the parsed infos, defaults to False
+    :type verbose: bool, optional
+    :param owned_files: Other files (or directories, for all files under them) to include the cursors of
+    , eg: the headers of a project, defaults to None: only include the cursors of `file`
+    :type owned_files: list, optional
+    :param metrics: Metrics to record the parse stages in, defaults to None
+    :type metrics: class:`clang_bind.metrics.Metrics`, optional
+    :param source: Source text to parse, `file` being its virtual filename, without writing it to disk
+    , defaults to None: read `file`
+    :type source: str, optional
+    :param allowed_kinds: Only add the cursors of these kinds, without descending into the others
+    , eg: :data:`clang_bind.generate.GENERATED_KINDS`, defaults to None: add all kinds
+    :type allowed_kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
+    :param ignored_kinds: Don't add the cursors of these kinds, nor descend into them, defaults to None
+    :type ignored_kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
     """
 
-    def __init__(self, file, compiler_arguments=[]):
+    def __init__(
+        self,
+        file,
+        compiler_arguments=[],
+        session=None,
+        precompiled_headers=None,
+        declarations_only=False,
+        incomplete=False,
+        compact=False,
+        verbose=False,
+        owned_files=None,
+        metrics=None,
+        source=None,
+        allowed_kinds=None,
+        ignored_kinds=None,
+    ):
         self._parsed_info_map = {}
-        index = clang.Index.create()
-        """
-        - Why parse using the option `PARSE_DETAILED_PROCESSING_RECORD`?
-            - Indicates that the parser should construct a detailed preprocessing record, 
-            including all macro definitions and instantiations
-            - Required to retrieve `CursorKind.INCLUSION_DIRECTIVE`
-        """
-        source_ast = index.parse(
-            path=file,
-            args=compiler_arguments,
-            options=clang.TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD,
-        )
+        # Position following the subtree of each node, indexed by the node's pre-order position
+        self._subtree_ends = array("i")
+        # Pre-order position of each node, the node identifiers of a compact tree already are their positions
+        self._positions = None if compact else {}
+        # (node identifiers by cursor kind id, by spelling), built on the first query
+        self._indexes = None
+        self._compact = compact
+        self._verbose = verbose
+        self._metrics = metrics
+        self.type_table = TypeTable()  # verbose information of the types
+        with measure(metrics, "parse", file):
+            source_ast = get_translation_unit(
+                file=file,
+                compiler_arguments=compiler_arguments,
+                session=session,
+                precompiled_headers=precompiled_headers,
+                declarations_only=declarations_only,
+                incomplete=incomplete,
+                source=source,
+            )
+        self.translation_unit = source_ast
         self.filename = source_ast.spelling
-        self.tree = Tree()
-        parsed_info = ParsedInfo(source_ast.cursor)
-        self.root_node = self.tree.create_node(tag=repr(parsed_info))
-        self._parsed_info_map[self.root_node.identifier] = parsed_info
-        self._construct_tree(self.root_node)
+        self._cursor_filter = CursorFilter(
+            self.filename,
+            declarations_only=declarations_only,
+            owned_files=owned_files,
+            allowed_kinds=allowed_kinds,
+            ignored_kinds=ignored_kinds,
+        )
+        self.tree = CompactTree() if compact else Tree()
+        with measure(metrics, "construct_tree", file) as counts:
+            self._construct_tree(self._create_node(source_ast.cursor))
+            counts["nodes"] = self.tree.size()
 
     @staticmethod
     def is_cursor_in_file(cursor, filename):
@@ -70,51 +935,148 @@ class Parse:
         return cursor.location.file and cursor.location.file.name == filename
 
     def _is_valid_child(self, child_cursor):
-        """Checks if the child is valid (child should be in the same file as the parent).
+        """Checks if the child is valid (child should be in the file, or in an owned file
+        , and be of an accepted kind, which excludes statements and expressions when parsing declarations only).
 
         :param child_cursor: The child cursor to check, an object of :class:`clang.cindex.Cursor`
         :type child_cursor: class:`clang.cindex.Cursor`
-        :return: `True` if child cursor in file, else `False`
+        :return: `True` if child cursor is valid, else `False`
         :rtype: bool
         """
-        return self.is_cursor_in_file(child_cursor, self.filename)
+        return self._cursor_filter.is_valid(child_cursor)
 
-    def _construct_tree(self, node):
-        """Recursively generates tree by traversing the AST of the node.
+    def _create_node(self, cursor, parent_node_id=None):
+        """Adds a node for the cursor to the tree.
 
-        :param node: An object of :class:`treelib.Node`
-        :type node: class:`treelib.Node`
+        :param cursor: An object of :class:`clang.cindex.Cursor`
+        :type cursor: class:`clang.cindex.Cursor`
+        :param parent_node_id: Parent node identifier, defaults to None: create the root
+        :type parent_node_id: `treelib.Tree.identifier` or int, optional
+        :return: Node identifier
+        :rtype: `treelib.Tree.identifier` or int
         """
-        cursor = self.get_parsed_info_from_node_id(node.identifier).cursor
-        for child_cursor in cursor.get_children():
-            if self._is_valid_child(child_cursor):
-                parsed_info = ParsedInfo(child_cursor)
-                child_node = self.tree.create_node(
-                    parent=node,
-                    tag=repr(parsed_info),
-                )
-                self._parsed_info_map[child_node.identifier] = parsed_info
-                self._construct_tree(child_node)
+        if self._compact:
+            node_id = self.tree.create_node(cursor, parent=parent_node_id)
+        else:
+            parsed_info = ParsedInfo(
+                cursor,
+                verbose=self._verbose,
+                metrics=self._metrics,
+                type_table=self.type_table,
+            )
+            node_id = self.tree.create_node(
+                parent=parent_node_id, tag=repr(parsed_info)
+            ).identifier
+            parsed_info.node_id = node_id
+            self._parsed_info_map[node_id] = parsed_info
+        if self._positions is not None:
+            self._positions[node_id] = len(self._subtree_ends)
+        self._subtree_ends.append(-1)  # set once the subtree is done
+        return node_id
+
+    def _get_position(self, node_id):
+        return node_id if self._positions is None else self._positions[node_id]
+
+    def _end_subtree(self, node_id):
+        self._subtree_ends[self._get_position(node_id)] = len(self._subtree_ends)
+
+    def _get_node_ids(self):
+        """Returns the node identifiers in pre-order."""
+        return range(self.tree.size()) if self._positions is None else self._positions
+
+    def _get_indexes(self):
+        """Returns the indexes of the nodes, built on first use: queries are rare, and the tree is not modified.
+
+        :return: (node identifiers by cursor kind id, node identifiers by spelling), in pre-order
+        :rtype: tuple
+        """
+        if self._indexes is None:
+            kind_index, spelling_index = defaultdict(list), defaultdict(list)
+            if self._compact:
+                for node_id, (kind_id, spelling_id) in enumerate(
+                    zip(self.tree.kind_ids, self.tree.spelling_ids)
+                ):
+                    kind_index[kind_id].append(node_id)
+                    spelling_index[self.tree.strings[spelling_id]].append(node_id)
+            else:
+                for node_id in self._positions:
+                    cursor = self._parsed_info_map[node_id].cursor
+                    kind_index[cursor._kind_id].append(node_id)
+                    spelling_index[cursor.spelling].append(node_id)
+            self._indexes = (kind_index, spelling_index)
+        return self._indexes
+
+    def _construct_tree(self, node_id):
+        """Generates tree by traversing the AST of the node, in a single `clang_visitChildren` pass.
+
+        - The visitor asks libclang to recurse into valid children, and to skip the subtrees of invalid ones.
+        - Parents are tracked with an explicit stack instead of Python recursion, so the depth is not limited.
+
+        :param node_id: Node identifier
+        :type node_id: `treelib.Tree.identifier` or int
+        """
+        cursor = self.get_parsed_info_from_node_id(node_id).cursor
+        # (cursor, node identifier) pairs from the root to the last visited node
+        stack = [(cursor, node_id)]
+        errors = []
+
+        def visitor(child_cursor, parent_cursor, _):
+            try:
+                # pop the nodes whose subtrees are done
+                while stack[-1][0] != parent_cursor:
+                    self._end_subtree(stack.pop()[1])
+                if not self._is_valid_child(child_cursor):
+                    return CHILD_VISIT_CONTINUE
+                child_cursor._tu = cursor._tu
+                child_node_id = self._create_node(child_cursor, stack[-1][1])
+                stack.append((child_cursor, child_node_id))
+                return CHILD_VISIT_RECURSE
+            except Exception as e:  # exceptions can't propagate through libclang
+                errors.append(e)
+                return CHILD_VISIT_BREAK
+
+        clang.conf.lib.clang_visitChildren(
+            cursor, clang.callbacks["cursor_visit"](visitor), None
+        )
+        if errors:
+            raise errors[0]
+        for _, stack_node_id in reversed(stack):
+            self._end_subtree(stack_node_id)
+
+    def get_includes(self):
+        """Returns the files included (transitively) by the parsed file.
+
+        :return: Paths of the included files
+        :rtype: list
+        """
+        paths = {
+            inclusion.include.name for inclusion in self.translation_unit.get_includes()
+        }
+        return sorted(paths)
 
     def get_tree(self):
         """Returns the constructed AST.
 
         :return: Constructed AST
-        :rtype: class:`treelib.Tree`
+        :rtype: class:`treelib.Tree` or class:`clang_bind.compact_tree.CompactTree`
         """
         return self.tree
 
     def get_node_id_from_parsed_info(self, parsed_info):
-        """Returns node identifier by performing a value based search of `_parsed_info_map`.
+        """Returns node identifier of the parsed info, in constant time for parsed infos of this tree.
+
+        - Parsed infos of this tree carry their node identifier.
+        - Otherwise, falls back to a search of the tree for the parsed info's cursor.
 
         :param parsed_info: An object of :class:`clang_bind.parse.ParsedInfo`
-        , the value to get the corresponding key from `_parsed_info_map`
         :type parsed_info`: class:`clang_bind.parse.ParsedInfo`
         :return node_id: Node identifier corresponding to `parsed_info`
         :rtype: `treelib.Tree.identifier`
         """
-        for node_id, parsed_info_ in self._parsed_info_map.items():
-            if parsed_info_ == parsed_info:
+        if parsed_info.node_id is not None:
+            return parsed_info.node_id
+        for node_id in self.tree.expand_tree():
+            if self.get_parsed_info_from_node_id(node_id).cursor == parsed_info.cursor:
                 return node_id
 
     def get_children_nodes_from_parent_parsed_info(self, parent_parsed_info):
@@ -122,7 +1084,7 @@ class Parse:
 
         :param parent_parsed_info: The parent object of :class:`clang_bind.parse.ParsedInfo`
         :type parent_parsed_info: class:`clang_bind.parse.ParsedInfo`
-        :return: Children nodes of :class:`treelib.Node`
+        :return: Children nodes of :class:`treelib.Node` (node identifiers for a compact tree)
         :rtype: list
         """
         return self.tree.children(self.get_node_id_from_parsed_info(parent_parsed_info))
@@ -136,6 +1098,17 @@ class Parse:
         :return: Parsed infos of :class:`clang_bind.parse.ParsedInfo`
         :rtype: list
         """
+        if self._compact:
+            return [
+                ParsedInfo(
+                    self.tree.get_cursor(node_id),
+                    verbose=self._verbose,
+                    node_id=node_id,
+                    metrics=self._metrics,
+                    type_table=self.type_table,
+                )
+                for node_id in node_ids
+            ]
         return list(map(lambda node_id: self._parsed_info_map.get(node_id), node_ids))
 
     def get_parsed_info_from_node_id(self, node_id):
@@ -152,12 +1125,12 @@ class Parse:
     def get_node_ids_from_nodes(nodes):
         """Returns a list of node identifiers from a list of nodes.
 
-        :param nodes: A list of objects of :class:`treelib.Node`
+        :param nodes: A list of objects of :class:`treelib.Node` (node identifiers for a compact tree)
         :type nodes: class:`treelib.Node`
         :return: A list of node identifiers of `treelib.Tree.identifier`
         :rtype: list
         """
-        return list(map(lambda node: node.identifier, nodes))
+        return list(map(lambda node: getattr(node, "identifier", node), nodes))
 
     def get_children_parsed_infos_from_parent_parsed_info(self, parent_parsed_info):
         """Returns children parsed infos from parent parsed infos.
@@ -168,7 +1141,289 @@ class Parse:
         :rtype: list
         """
         return self.get_parsed_infos_from_node_ids(
-            self.get_node_ids_from_nodes(
-                self.get_children_nodes_from_parent_parsed_info(parent_parsed_info)
+            self.tree.is_branch(self.get_node_id_from_parsed_info(parent_parsed_info))
+        )
+
+    def query(self, kind=None, spelling=None, within=None):
+        """Returns the nodes of the given kind and spelling, answered from indexes built on the first query.
+
+        - eg: the methods of the classes named `X`:
+        `parser.query(kind="CXX_METHOD", within=parser.query(kind="CLASS_DECL", spelling="X"))`
+
+        :param kind: Cursor kind of the nodes, defaults to None: any kind
+        :type kind: class:`clang.cindex.CursorKind` or str, optional
+        :param spelling: Spelling of the nodes, defaults to None: any spelling
+        :type spelling: str, optional
+        :param within: Node identifier(s) the nodes must be descendants of, defaults to None: anywhere
+        :type within: `treelib.Tree.identifier`, int or list, optional
+        :return: Node identifiers, in pre-order
+        :rtype: list
+        """
+        if kind is None and spelling is None:
+            node_ids = self._get_node_ids()
+        else:
+            kind_index, spelling_index = self._get_indexes()
+            candidates = []
+            if kind is not None:
+                if isinstance(kind, str):
+                    kind = getattr(clang.CursorKind, kind)
+                candidates.append(kind_index.get(kind.value, []))
+            if spelling is not None:
+                candidates.append(spelling_index.get(spelling, []))
+            candidates.sort(key=len)
+            node_ids = candidates[0]
+            for other in candidates[1:]:
+                other = set(other)
+                node_ids = [node_id for node_id in node_ids if node_id in other]
+
+        if within is None:
+            return list(node_ids)
+        if not isinstance(within, list):
+            within = [within]
+        # Descendants are the positions strictly inside the ranges of the subtrees, merged when nested
+        starts, ends = [], []
+        for start in sorted(self._get_position(node_id) for node_id in within):
+            if ends and start < ends[-1]:
+                continue
+            starts.append(start)
+            ends.append(self._subtree_ends[start])
+        descendants = []
+        for node_id in node_ids:
+            position = self._get_position(node_id)
+            i = bisect_left(starts, position) - 1
+            if i >= 0 and position < ends[i]:
+                descendants.append(node_id)
+        return descendants
+
+    def iter_dicts(self, node_id=None, depth=0, merge_info=False):
+        """Yields the nodes of the tree (or of the subtree rooted at `node_id`) in pre-order
+        , in the schema consumed by :mod:`clang_bind.generate`, eg: to stream them to a file.
+
+        :param node_id: Node identifier of the subtree's root, defaults to None: the tree's root
+        :type node_id: `treelib.Tree.identifier`, optional
+        :param depth: Depth of the subtree's root, defaults to 0
+        :type depth: int, optional
+        :param merge_info: Add the information needed to merge declarations, see
+        :meth:`clang_bind.parse.ParsedInfo.get_dict`, defaults to False
+        :type merge_info: bool, optional
+        :return: (depth, parsed info without the `members` key) pairs
+        :rtype: generator
+        """
+        if node_id is None:
+            node_id = self.tree.root
+        stack = [(node_id, depth)]
+        while stack:
+            node_id, depth = stack.pop()
+            yield depth, self.get_parsed_info_from_node_id(node_id).get_dict(
+                depth, merge_info
+            )
+            stack.extend(
+                (child_id, depth + 1)
+                for child_id in reversed(self.tree.is_branch(node_id))
             )
+
+    def get_view(self, node_id=None, depth=0):
+        """Returns the tree (or the subtree rooted at `node_id`) as read-only nested dict views over the live cursors
+        , in the schema consumed by :mod:`clang_bind.generate`: `generate.generate(parsed_info=parser.get_view())`.
+
+        :param node_id: Node identifier of the subtree's root, defaults to None: the tree's root
+        :type node_id: `treelib.Tree.identifier`, optional
+        :param depth: Depth of the subtree's root, defaults to 0
+        :type depth: int, optional
+        :return: View of the subtree's root
+        :rtype: class:`clang_bind.parse.CursorView`
+        """
+        return CursorView(self, self.tree.root if node_id is None else node_id, depth)
+
+    def get_dict(self, node_id=None, depth=0, merge_info=False):
+        """Returns the tree (or the subtree rooted at `node_id`) as a nested dict
+        , in the schema consumed by :mod:`clang_bind.generate`.
+
+        :param node_id: Node identifier of the subtree's root, defaults to None: the tree's root
+        :type node_id: `treelib.Tree.identifier`, optional
+        :param depth: Depth of the subtree's root, defaults to 0
+        :type depth: int, optional
+        :param merge_info: Add the information needed to merge declarations, see
+        :meth:`clang_bind.parse.ParsedInfo.get_dict`, defaults to False
+        :type merge_info: bool, optional
+        :return: Parsed infos, with children under the `members` key
+        :rtype: dict
+        """
+        if node_id is None:
+            with measure(self._metrics, "serialize", self.filename) as counts:
+                info = self.get_dict(self.tree.root, depth, merge_info)
+                counts["nodes"] = self.tree.size()
+            return info
+        # Iterative, so that the depth of the tree is not limited by the recursion limit
+        root = None
+        path = []  # members of the nodes on the path to the last built node
+        for node_depth, info in self.iter_dicts(node_id, depth, merge_info):
+            info["members"] = []
+            del path[node_depth - depth :]
+            if path:
+                path[-1].append(info)
+            else:
+                root = info
+            path.append(info["members"])
+        return root
+
+
+def parse_sources(sources, compiler_arguments=[], session=None, **kwargs):
+    """Parses source texts, eg: a suite of snippets, with a single index and without writing them to disk.
+
+    :param sources: Virtual filenames and source texts: {filename: source} or (filename, source) pairs
+    :type sources: dict or iterable
+    :param compiler_arguments: Compiler arguments to use while parsing
+    :type compiler_arguments: list, optional
+    :param session: Session to parse with, defaults to None: a new session which does not keep translation units
+    alive, so that reusing a virtual filename never reparses (and invalidates) a tree already yielded
+    :type session: class:`clang_bind.parse.ParseSession`, optional
+    :param kwargs: Other keyword arguments of :class:`clang_bind.parse.Parse`
+    :return: Parsers of :class:`clang_bind.parse.Parse`, in the order of `sources`
+    :rtype: generator
+    """
+    if session is None:
+        session = ParseSession(max_translation_units=0)
+    if isinstance(sources, dict):
+        sources = sources.items()
+    for file, source in sources:
+        yield Parse(file, compiler_arguments, session=session, source=source, **kwargs)
+
+
+def iter_parse(
+    file,
+    compiler_arguments=[],
+    kinds=None,
+    prune_kinds=None,
+    verbose=False,
+    owned_files=None,
+    allowed_kinds=None,
+    ignored_kinds=None,
+    batch_size=1024,
+    **kwargs,
+):
+    """Parses a file and yields its parsed infos in pre-order, straight from the AST traversal
+    , without constructing a tree.
+
+    - The AST is walked in a single `clang_visitChildren` pass, as by :class:`clang_bind.parse.Parse`. The walk runs
+    in a helper thread which pauses after each batch of parsed infos until they are consumed: the first results come
+    out before the whole translation unit is walked, memory stays flat, and libclang is never used by both threads
+    at once.
+    - Node identifiers are the pre-order positions of the nodes, as in a
+    :class:`clang_bind.compact_tree.CompactTree` built with the same options.
+
+    :param file: File to parse
+    :type file: str
+    :param compiler_arguments: Compiler arguments to use while parsing
+    :type compiler_arguments: list, optional
+    :param kinds: Only yield the cursors of these kinds, defaults to None: yield all
+    :type kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
+    :param prune_kinds: Don't descend into the cursors of these kinds, defaults to None: descend into all
+    :type prune_kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
+    :param verbose: Add additional information about the cursors to the parsed infos, defaults to False
+    :type verbose: bool, optional
+    :param owned_files: Other files (or directories, for all files under them) to yield the cursors of
+    , defaults to None: only yield the cursors of `file`
+    :type owned_files: list, optional
+    :param allowed_kinds: Only walk the cursors of these kinds, pruning the others with their subtrees
+    , as :class:`clang_bind.parse.Parse` does, defaults to None: walk all kinds
+    :type allowed_kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
+    :param ignored_kinds: Prune the cursors of these kinds with their subtrees, defaults to None
+    :type ignored_kinds: iterable of class:`clang.cindex.CursorKind` or kind names, optional
+    :param batch_size: Number of parsed infos walked ahead of the consumer, defaults to 1024
+    :type batch_size: int, optional
+    :param kwargs: Other keyword arguments of :func:`clang_bind.parse.get_translation_unit`
+    :return: (depth, parent node identifier, parsed info) tuples
+    , the parent node identifier of the root being `None`
+    :rtype: generator
+    """
+    translation_unit = get_translation_unit(file, compiler_arguments, **kwargs)
+    cursor_filter = CursorFilter(
+        translation_unit.spelling,
+        declarations_only=kwargs.get("declarations_only", False),
+        owned_files=owned_files,
+        allowed_kinds=allowed_kinds,
+        ignored_kinds=ignored_kinds,
+    )
+    kind_ids = None if kinds is None else CursorFilter.get_kind_ids(kinds)
+    prune_kind_ids = CursorFilter.get_kind_ids(prune_kinds or [])
+    type_table = TypeTable()  # verbose information of the types
+    cursor = translation_unit.cursor
+    if kind_ids is None or cursor._kind_id in kind_ids:
+        yield 0, None, ParsedInfo(
+            cursor, verbose=verbose, node_id=0, type_table=type_table
         )
+    if cursor._kind_id in prune_kind_ids:
+        return
+
+    batches = queue.Queue()  # batches of parsed infos, `None` once the walk is done
+    resumes = queue.Queue()  # `True` to walk the next batch, `False` to stop walking
+
+    def walk():
+        # (cursor, node identifier) pairs from the root to the last visited node
+        stack = [(cursor, 0)]
+        batch = []
+        node_count = 1
+
+        def visitor(child_cursor, parent_cursor, _):
+            nonlocal batch, node_count
+            try:
+                # pop the nodes whose subtrees are done
+                while stack[-1][0] != parent_cursor:
+                    stack.pop()
+                if not cursor_filter.is_valid(child_cursor):
+                    return CHILD_VISIT_CONTINUE
+                child_cursor._tu = cursor._tu
+                node_id = node_count
+                node_count += 1
+                kind_id = child_cursor._kind_id
+                if kind_ids is None or kind_id in kind_ids:
+                    batch.append(
+                        (
+                            len(stack),
+                            stack[-1][1],
+                            ParsedInfo(
+                                child_cursor,
+                                verbose=verbose,
+                                node_id=node_id,
+                                type_table=type_table,
+                            ),
+                        )
+                    )
+                if kind_id in prune_kind_ids:
+                    result = CHILD_VISIT_CONTINUE
+                else:
+                    stack.append((child_cursor, node_id))
+                    result = CHILD_VISIT_RECURSE
+                if len(batch) >= batch_size:
+                    batches.put(batch)
+                    batch = []
+                    if not resumes.get():  # paused until the batch is consumed
+                        return CHILD_VISIT_BREAK
+                return result
+            except Exception as e:  # exceptions can't propagate through libclang
+                batch = e
+                return CHILD_VISIT_BREAK
+
+        clang.conf.lib.clang_visitChildren(
+            cursor, clang.callbacks["cursor_visit"](visitor), None
+        )
+        batches.put(batch)
+        batches.put(None)
+
+    walker = threading.Thread(target=walk, daemon=True)
+    walker.start()
+    try:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            yield from batch
+            if walker.is_alive():
+                resumes.put(True)
+    finally:
+        if walker.is_alive():  # the consumer stopped early
+            resumes.put(False)
+        walker.join()
@@ -0,0 +1,595 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import clang_bind.binary_format as binary_format
+import clang_bind.lazy_json as lazy_json
+import clang_bind.utils as utils
+from clang_bind.cache import ParseCache
+from clang_bind.cmake_frontend import CompilationDatabase
+from clang_bind.dependency_graph import DependencyGraph
+from clang_bind.generate import GENERATED_KINDS
+from clang_bind.merge import DeclarationMerger
+from clang_bind.metrics import Metrics, measure
+from clang_bind.parse import Parse, ParseSession, PrecompiledHeaders
+from clang_bind.symbol_index import SymbolIndex, get_symbols
+
+
+class ParseResult:
+    """This is a data holder class containing the outcome of parsing a single translation unit.
+
+    Only plain data is held, so that results can be sent back from worker processes.
+
+    :param file: The parsed file
+    :type file: str
+    :param parsed_info: Parsed infos as returned by :meth:`clang_bind.parse.Parse.get_dict`, defaults to None
+    :type parsed_info: dict, optional
+    :param error: Description of the error raised while parsing, defaults to None
+    :type error: str, optional
+    :param cached: The parsed infos come from the parse cache, defaults to False
+    :type cached: bool, optional
+    :param includes: Paths of the files the parsed file depends on, defaults to None
+    :type includes: list, optional
+    :param symbols: Symbols declared in the parsed file, as returned by
+    :func:`clang_bind.symbol_index.get_symbols`, defaults to None
+    :type symbols: list, optional
+    :param metrics: Metrics records measured while parsing, as returned by
+    :meth:`clang_bind.metrics.Metrics.get_records`, defaults to None
+    :type metrics: list, optional
+    :param output_filepath: Path of the file the parsed infos were written to instead of being returned
+    , defaults to None
+    :type output_filepath: str, optional
+    """
+
+    def __init__(
+        self,
+        file,
+        parsed_info=None,
+        error=None,
+        cached=False,
+        includes=None,
+        symbols=None,
+        metrics=None,
+        output_filepath=None,
+    ):
+        self.file = file
+        self.parsed_info = parsed_info
+        self.error = error
+        self.cached = cached
+        self.includes = includes or []
+        self.symbols = symbols
+        self.metrics = metrics
+        self.output_filepath = output_filepath
+
+    def __repr__(self) -> str:
+        return f"ParseResult:'{self.file}'"
+
+
+# Per worker state: each thread (or process) of the pool owns its own parse session
+_worker_state = threading.local()
+
+
+def _get_worker_session():
+    """Returns the parse session owned by the calling worker, creating it on first use.
+
+    :return: The worker's parse session
+    :rtype: class:`clang_bind.parse.ParseSession`
+    """
+    session = getattr(_worker_state, "session", None)
+    if session is None:
+        # Translation units are not requested twice in a run, only the index is worth sharing
+        session = _worker_state.session = ParseSession(max_translation_units=0)
+    return session
+
+
+def _get_dependencies(parser, compiler_arguments):
+    """Returns the files the parsed file depends on: the files it includes and the inputs of its precompiled header
+    , if any. The precompiled header itself differs on every build, and hides the inclusions of its headers.
+
+    :param parser: Parser of the file
+    :type parser: class:`clang_bind.parse.Parse`
+    :param compiler_arguments: Compiler arguments used while parsing
+    :type compiler_arguments: list
+    :return: Paths of the dependencies
+    :rtype: list
+    """
+    dependencies = parser.get_includes()
+    if "-include-pch" in compiler_arguments:
+        dependencies.extend(
+            PrecompiledHeaders.get_inputs(
+                compiler_arguments[compiler_arguments.index("-include-pch") + 1]
+            )
+        )
+    return dependencies
+
+
+def _dump(filepath, parsed_info=None, nodes=None, indent=2, json_index=False):
+    """Writes parsed infos in the binary format of :mod:`clang_bind.binary_format` if the path has its extension
+    , in JSON otherwise: indexed, or compressed if the path has an extension of :data:`clang_bind.utils.COMPRESSIONS`.
+
+    :param filepath: Path of the output file
+    :type filepath: str
+    :param parsed_info: Parsed infos as returned by :meth:`clang_bind.parse.Parse.get_dict`, defaults to None
+    :type parsed_info: dict, optional
+    :param nodes: Or (depth, parsed info) pairs in pre-order, as yielded by :meth:`clang_bind.parse.Parse.iter_dicts`
+    , defaults to None
+    :type nodes: iterable, optional
+    :param indent: Indentation of JSON files, `None` for compact output, defaults to 2
+    :type indent: int, optional
+    :param json_index: Index JSON files, to load them lazily with :func:`clang_bind.lazy_json.load`, defaults to False
+    :type json_index: bool, optional
+    """
+    binary = filepath.endswith(binary_format.EXTENSION)
+    # Indexes refer to offsets in the decompressed JSON, which can not be mapped
+    json_index = json_index and not utils.get_compression_extension(filepath)
+    if parsed_info is not None:
+        # Streamed, so that the depth of the tree is not limited by the recursion limit
+        nodes = binary_format.iter_nodes(parsed_info)
+    if binary:
+        binary_format.dump(filepath, nodes)
+    elif json_index:
+        lazy_json.dump(filepath, nodes, indent)
+    else:
+        index_path = lazy_json.get_index_path(filepath)
+        if os.path.exists(index_path):  # left by a previous run, out of date
+            os.remove(index_path)
+        utils.dump_json_stream(filepath, nodes, indent)
+
+
+def parse_translation_unit(
+    file,
+    compiler_arguments,
+    output_filepath=None,
+    declarations_only=False,
+    owned_files=None,
+    cache=None,
+    symbols=False,
+    metrics=False,
+    allowed_kinds=None,
+    indent=2,
+    json_index=False,
+    merge_info=False,
+):
+    """Parses a translation unit, isolating any error raised while doing so.
+
+    :param file: File to parse
+    :type file: str
+    :param compiler_arguments: Compiler arguments to use while parsing
+    :type compiler_arguments: list
+    :param output_filepath: Write the parsed infos to this file (JSON, or binary given its extension) instead of
+    returning them; without a cache they are streamed while walking the tree, defaults to None
+    :type output_filepath: str, optional
+    :param declarations_only: Skip function bodies, statements and expressions, defaults to False
+    :type declarations_only: bool, optional
+    :param owned_files: Other files (or directories) to include the cursors of, defaults to None
+    :type owned_files: list, optional
+    :param cache: Cache to look the parse result up in and to store it in, defaults to None
+    :type cache: class:`clang_bind.cache.ParseCache`, optional
+    :param symbols: Get the symbols declared in the file too, defaults to False
+    :type symbols: bool, optional
+    :param metrics: Measure the parse stages, defaults to False
+    :type metrics: bool, optional
+    :param allowed_kinds: Names of the only cursor kinds to parse, defaults to None: parse all kinds
+    :type allowed_kinds: list, optional
+    :param indent: Indentation of the JSON file, `None` for compact output, defaults to 2
+    :type indent: int, optional
+    :param json_index: Index the JSON file, to load it lazily, defaults to False
+    :type json_index: bool, optional
+    :param merge_info: Add the information needed to merge declarations to the parsed infos, defaults to False
+    :type merge_info: bool, optional
+    :return: The parse result, with either `parsed_info` (or `output_filepath`) or `error` set
+    :rtype: class:`clang_bind.project.ParseResult`
+    """
+    options = {
+        "declarations_only": declarations_only,
+        "owned_files": owned_files,
+        "symbols": symbols,
+        "allowed_kinds": allowed_kinds and sorted(allowed_kinds),
+        "merge_info": merge_info,
+    }
+    # Measured in the worker, records are sent back as plain data
+    metrics = Metrics() if metrics else None
+    try:
+        if cache is not None:
+            with measure(metrics, "cache_lookup", file):
+                entry = cache.get(file, compiler_arguments, options)
+            if entry is not None:
+                if output_filepath is not None:
+                    with measure(metrics, "dump", file):
+                        _dump(
+                            output_filepath,
+                            entry["parsed_info"],
+                            indent=indent,
+                            json_index=json_index,
+                        )
+                    entry["parsed_info"] = None
+                return ParseResult(
+                    file,
+                    parsed_info=entry["parsed_info"],
+                    cached=True,
+                    includes=cache.get_includes(file, compiler_arguments, options),
+                    symbols=entry["symbols"],
+                    metrics=metrics and metrics.get_records(),
+                    output_filepath=output_filepath,
+                )
+        parser = Parse(
+            file,
+            compiler_arguments,
+            session=_get_worker_session(),
+            declarations_only=declarations_only,
+            owned_files=owned_files,
+            compact=True,  # the tree is only serialized
+            metrics=metrics,
+            allowed_kinds=allowed_kinds,
+        )
+        if output_filepath is not None and cache is None:
+            # Nothing needs the nested dict: write the nodes while walking the tree
+            with measure(metrics, "dump", file) as counts:
+                _dump(
+                    output_filepath,
+                    nodes=parser.iter_dicts(merge_info=merge_info),
+                    indent=indent,
+                    json_index=json_index,
+                )
+                counts["nodes"] = parser.tree.size()
+            entry = {"parsed_info": None, "symbols": None}
+        else:
+            entry = {
+                "parsed_info": parser.get_dict(merge_info=merge_info),
+                "symbols": None,
+            }
+        if symbols:
+            with measure(metrics, "symbols", file) as counts:
+                entry["symbols"] = get_symbols(parser)
+                counts["nodes"] = parser.tree.size()
+        includes = _get_dependencies(parser, compiler_arguments)
+        if cache is not None:
+            with measure(metrics, "cache_store", file):
+                cache.put(file, compiler_arguments, includes, entry, options)
+            if output_filepath is not None:
+                with measure(metrics, "dump", file):
+                    _dump(
+                        output_filepath,
+                        entry["parsed_info"],
+                        indent=indent,
+                        json_index=json_index,
+                    )
+                entry["parsed_info"] = None
+        return ParseResult(
+            file,
+            includes=includes,
+            metrics=metrics and metrics.get_records(),
+            output_filepath=output_filepath,
+            **entry,
+        )
+    except Exception as e:  # isolate the failure to this translation unit
+        return ParseResult(file, error=f"{type(e).__name__}: {e}")
+
+
+class ProjectParser:
+    """This is a class which parses the translation units of a compilation database in parallel.
+
+    :param build_dir: Directory containing the compilation database
+    :type build_dir: str
+    :param jobs: Number of workers, defaults to None: the number of CPUs
+    :type jobs: int, optional
+    :param use_processes: Use a pool of processes instead of a pool of threads, defaults to False
+    :type use_processes: bool, optional
+    :param precompiled_headers: Precompiled headers to parse with, defaults to None
+    :type precompiled_headers: class:`clang_bind.parse.PrecompiledHeaders`, optional
+    :param declarations_only: Skip function bodies, statements and expressions, defaults to False
+    :type declarations_only: bool, optional
+    :param owned_files: Other files (or directories, for all files under them) to include the cursors of
+    , eg: the headers of the project, defaults to None: only include the cursors of each source file
+    :type owned_files: list, optional
+    :param cache: Cache to look parse results up in and to store them in, defaults to None
+    :type cache: class:`clang_bind.cache.ParseCache`, optional
+    :param dependency_graph: Dependency graph of the previous runs, to only parse the files whose dependencies
+    changed since, defaults to None: parse all files
+    :type dependency_graph: class:`clang_bind.dependency_graph.DependencyGraph`, optional
+    :param merge_declarations: Store the declarations shared by several files once, in the first file's parsed infos
+    , and references to them in the others', defaults to False. Merged outputs refer to each other: re-parsing only
+    some of them could lose declarations, it can't be used with a `dependency_graph`
+    :type merge_declarations: bool, optional
+    :raises ValueError: If both `dependency_graph` and `merge_declarations` are given
+    :param symbol_index: Index to update with the symbols declared in the parsed files, defaults to None
+    :type symbol_index: class:`clang_bind.symbol_index.SymbolIndex`, optional
+    :param metrics: Metrics to record the parse stages of each file in, defaults to None
+    :type metrics: class:`clang_bind.metrics.Metrics`, optional
+    :param allowed_kinds: Names of the only cursor kinds to parse
+    , eg: :data:`clang_bind.generate.GENERATED_KINDS`, defaults to None: parse all kinds
+    :type allowed_kinds: iterable, optional
+    :param indent: Indentation of the JSON files written by :meth:`parse`, `None` for compact output, defaults to 2
+    :type indent: int, optional
+    :param json_index: Index the JSON files written by :meth:`parse`, for generate to load them lazily
+    , defaults to False
+    :type json_index: bool, optional
+    """
+
+    def __init__(
+        self,
+        build_dir,
+        jobs=None,
+        use_processes=False,
+        precompiled_headers=None,
+        declarations_only=False,
+        owned_files=None,
+        cache=None,
+        dependency_graph=None,
+        merge_declarations=False,
+        symbol_index=None,
+        metrics=None,
+        allowed_kinds=None,
+        indent=2,
+        json_index=False,
+    ):
+        if merge_declarations and dependency_graph is not None:
+            raise ValueError(
+                "Declarations can't be merged while only parsing the files whose dependencies changed"
+            )
+        self.compilation_database = CompilationDatabase(build_dir)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.precompiled_headers = precompiled_headers
+        self.declarations_only = declarations_only
+        self.owned_files = owned_files
+        self.cache = cache
+        self.dependency_graph = dependency_graph
+        self.merge_declarations = merge_declarations
+        self.symbol_index = symbol_index
+        self.metrics = metrics
+        self.allowed_kinds = allowed_kinds
+        self.indent = indent
+        self.json_index = json_index
+
+    def get_compilation_arguments(self, files=None):
+        """Returns the compilation arguments of the files, sorted by filename.
+
+        :param files: Files to get the compilation arguments of, defaults to None: get for all files
+        :type files: list, optional
+        :return: Filenames and their compiler arguments: {filename: compiler arguments}
+        :rtype: dict
+        """
+        if files:
+            compilation_arguments = {}
+            for file in files:
+                compilation_arguments.update(
+                    self.compilation_database.get_compilation_arguments(file)
+                )
+        else:
+            compilation_arguments = (
+                self.compilation_database.get_compilation_arguments()
+            )
+        return dict(sorted(compilation_arguments.items()))
+
+    def _get_graph_options(self, file, output_paths):
+        """Returns the options recorded in the dependency graph with a file: the ones affecting the parse or its
+        output, besides the compiler arguments.
+
+        :param file: Parsed file
+        :type file: str
+        :param output_paths: Paths of the files to write the parsed infos to: {filename: output path}, or None
+        :type output_paths: dict
+        :return: Options, JSON serializable
+        :rtype: dict
+        """
+        return {
+            "declarations_only": self.declarations_only,
+            "owned_files": self.owned_files and list(self.owned_files),
+            "allowed_kinds": self.allowed_kinds and sorted(self.allowed_kinds),
+            # Its extension gives the format: JSON, compressed JSON or binary
+            "output_filepath": output_paths and output_paths.get(file),
+            "indent": self.indent,
+            "json_index": self.json_index,
+        }
+
+    def _map(self, worker, compilation_arguments, output_paths):
+        """Runs the worker on the files in a pool, yielding the results in filename order.
+
+        A worker process crashing (eg: in libclang) breaks its pool, failing every file it was parsing: the pool is
+        then recreated and these files are parsed again, the first one alone, so that only the crashing file gets an
+        error result.
+
+        :param worker: Function parsing a file: `worker(file, compiler_arguments, output_filepath)`
+        :type worker: callable
+        :param compilation_arguments: Files and their compiler arguments: {filename: compiler arguments}
+        :type compilation_arguments: dict
+        :param output_paths: Paths of the files to write the parsed infos to: {filename: output path}
+        :type output_paths: dict
+        :return: Parse results of :class:`clang_bind.project.ParseResult`
+        :rtype: generator
+        """
+        executor_class = (
+            ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        )
+
+        def submit(executor, file):
+            return executor.submit(
+                worker, file, compilation_arguments[file], output_paths.get(file)
+            )
+
+        executor = executor_class(max_workers=self.jobs)
+        try:
+            futures = {file: submit(executor, file) for file in compilation_arguments}
+            for file in compilation_arguments:
+                try:
+                    result = futures[file].result()
+                except BrokenProcessPool:
+                    executor.shutdown()  # every pending file has failed once it returns
+                    executor = executor_class(max_workers=self.jobs)
+                    for pending_file, future in futures.items():
+                        if pending_file != file and isinstance(
+                            future.exception(), BrokenProcessPool
+                        ):
+                            futures[pending_file] = submit(executor, pending_file)
+                    with executor_class(max_workers=1) as isolated_executor:
+                        try:
+                            result = submit(isolated_executor, file).result()
+                        except BrokenProcessPool as e:
+                            result = ParseResult(file, error=f"{type(e).__name__}: {e}")
+                yield result
+        finally:
+            executor.shutdown()
+
+    def parse(self, files=None, output_paths=None):
+        """Parses the files, yielding results in filename order regardless of completion order.
+
+        With a dependency graph, only the files whose dependencies, compiler arguments or options changed since the
+        previous run are parsed.
+
+        With output paths, the parsed infos are written to files (JSON, or binary given the extension of
+        :mod:`clang_bind.binary_format`) instead of being returned
+        : by the workers, streamed while walking the tree when neither a cache nor merging needs them as dicts.
+
+        :param files: Files to parse, defaults to None: parse all files
+        :type files: list, optional
+        :param output_paths: Paths of the files to write the parsed infos to: {filename: output path}
+        , defaults to None: return the parsed infos
+        :type output_paths: dict, optional
+        :return: Parse results of :class:`clang_bind.project.ParseResult`
+        :rtype: generator
+        """
+        compilation_arguments = self.get_compilation_arguments(files)
+        if self.precompiled_headers is not None:
+            # Build each precompiled header once, before the workers need it
+            compilation_arguments = {
+                file: self.precompiled_headers.get_compiler_arguments(arguments)
+                for file, arguments in compilation_arguments.items()
+            }
+        if self.dependency_graph is not None:
+            graph_options = {
+                file: self._get_graph_options(file, output_paths)
+                for file in compilation_arguments
+            }
+            compilation_arguments = {
+                file: compilation_arguments[file]
+                for file in self.dependency_graph.get_dirty_files(
+                    compilation_arguments, graph_options
+                )
+            }
+        merger = DeclarationMerger() if self.merge_declarations else None
+        # Merging needs every file's parsed infos, they are written once merged
+        worker_output_paths = (
+            {} if output_paths is None or merger is not None else output_paths
+        )
+        hits = misses = 0
+        worker = partial(
+            parse_translation_unit,
+            declarations_only=self.declarations_only,
+            owned_files=self.owned_files,
+            cache=self.cache,
+            symbols=self.symbol_index is not None,
+            metrics=self.metrics is not None,
+            allowed_kinds=self.allowed_kinds,
+            indent=self.indent,
+            json_index=self.json_index,
+            merge_info=merger is not None,
+        )
+        for result in self._map(worker, compilation_arguments, worker_output_paths):
+            if self.metrics is not None and result.metrics:
+                self.metrics.merge(result.metrics)
+            if result.cached:
+                hits += 1
+            elif not result.error:
+                misses += 1
+            if self.dependency_graph is not None:
+                if result.error:
+                    self.dependency_graph.remove(result.file)
+                else:
+                    self.dependency_graph.update(
+                        result.file,
+                        compilation_arguments[result.file],
+                        result.includes,
+                        graph_options[result.file],
+                    )
+            if self.symbol_index is not None and not result.error:
+                self.symbol_index.update(result.file, result.symbols)
+            if merger is not None and not result.error:
+                merger.merge(result.file, result.parsed_info)
+                if output_paths is not None:
+                    result.output_filepath = output_paths[result.file]
+                    with measure(self.metrics, "dump", result.file):
+                        _dump(
+                            result.output_filepath,
+                            result.parsed_info,
+                            indent=self.indent,
+                            json_index=self.json_index,
+                        )
+            yield result
+        if self.dependency_graph is not None:
+            self.dependency_graph.save()
+        if self.symbol_index is not None:
+            self.symbol_index.prune()
+        if self.cache is not None:
+            self.cache.update_stats(hits=hits, misses=misses)
+            self.cache.evict()
+
+
+def main():
+    args = utils.parse_arguments(script="parse")
+
+    precompiled_headers = None
+    if args.precompiled_headers:
+        precompiled_headers = PrecompiledHeaders(
+            headers=args.precompiled_headers,
+            output_dir=args.precompiled_headers_path
+            or utils.join_path(args.json_output_path, "pch"),
+        )
+    project_parser = ProjectParser(
+        build_dir=args.compilation_database_path,
+        jobs=args.jobs,
+        use_processes=args.use_processes,
+        precompiled_headers=precompiled_headers,
+        declarations_only=args.declarations_only,
+        owned_files=args.owned_paths,
+        cache=(
+            ParseCache(
+                cache_dir=args.cache_dir, max_size=args.cache_max_size * 1024**2
+            )
+            if args.cache_dir
+            else None
+        ),
+        dependency_graph=(
+            DependencyGraph(
+                args.dependency_graph_path
+                or utils.join_path(args.json_output_path, "dependencies.json")
+            )
+            if args.incremental
+            else None
+        ),
+        merge_declarations=args.merge_declarations,
+        symbol_index=SymbolIndex(args.symbol_index) if args.symbol_index else None,
+        metrics=Metrics() if args.metrics else None,
+        allowed_kinds=GENERATED_KINDS if args.generated_kinds_only else None,
+        indent=None if args.compact else 2,
+        json_index=args.json_index,
+    )
+    files = [utils.get_realpath(path=file) for file in args.files]
+    output_dir = utils.join_path(args.json_output_path, "json")
+    if args.binary:
+        extension = binary_format.EXTENSION
+    else:
+        extension = f".json.{args.compression}" if args.compression else ".json"
+    output_paths = {
+        file: utils.get_output_path(
+            source=file,
+            output_dir=output_dir,
+            split_from=args.project_root,
+            extension=extension,
+        )
+        for file in project_parser.get_compilation_arguments(files)
+    }
+    for result in project_parser.parse(files, output_paths=output_paths):
+        if result.error:
+            print(f"Skipping {result.file}: {result.error}")
+            continue
+        out_rel_path = os.path.relpath(result.output_filepath, args.json_output_path)
+        print(f"Producing ./{out_rel_path}")
+    if args.metrics:
+        project_parser.metrics.dump(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import sqlite3
+
+import clang.cindex as clang
+
+
+def get_qualified_name(cursor):
+    """Returns the fully qualified name of the declaration, eg: `pcl::PointXYZ`.
+
+    :param cursor: An object of :class:`clang.cindex.Cursor`
+    :type cursor: class:`clang.cindex.Cursor`
+    :return: Fully qualified name, anonymous scopes are skipped
+    :rtype: str
+    """
+    names = []
+    while cursor is not None and cursor.kind != clang.CursorKind.TRANSLATION_UNIT:
+        if cursor.spelling and not cursor.is_anonymous():
+            names.append(cursor.spelling)
+        cursor = cursor.semantic_parent
+    return "::".join(reversed(names))
+
+
+def get_symbols(parser):
+    """Returns the symbols declared in the parsed tree.
+
+    :param parser: Parser whose tree to get the symbols of
+    :type parser: class:`clang_bind.parse.Parse`
+    :return: Symbols: (usr, qualified name, kind, file, line, column, canonical type spelling)
+    :rtype: list
+    """
+    symbols = []
+    for node_id in parser.tree.expand_tree():
+        cursor = parser.get_parsed_info_from_node_id(node_id).cursor
+        if not cursor.kind.is_declaration():
+            continue
+        usr = cursor.get_usr()
+        if not usr:
+            continue
+        location = cursor.location
+        symbols.append(
+            (
+                usr,
+                get_qualified_name(cursor),
+                cursor.kind.name,
+                location.file.name if location.file else None,
+                location.line,
+                location.column,
+                cursor.type.get_canonical().spelling,
+            )
+        )
+    return symbols
+
+
+class SymbolIndex:
+    """This is a class which indexes the symbols declared in a project on disk, in an SQLite database
+    , to resolve names by lookups instead of walking trees or parsing again.
+
+    - Symbols are keyed by USR and location, a symbol declared in a header is stored once for all the translation
+    units including it.
+    - Updating a translation unit replaces its symbols, symbols no translation unit declares anymore are dropped.
+
+    :param path: Path of the database, created if it does not exist
+    :type path: str
+    """
+
+    _schema = """
+        CREATE TABLE IF NOT EXISTS symbols (
+            id INTEGER PRIMARY KEY,
+            usr TEXT NOT NULL,
+            qualified_name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            file TEXT,
+            line INTEGER,
+            column INTEGER,
+            type TEXT,
+            UNIQUE (usr, file, line, column)
+        );
+        CREATE INDEX IF NOT EXISTS symbols_qualified_name ON symbols (qualified_name);
+        CREATE TABLE IF NOT EXISTS translation_units (
+            file TEXT NOT NULL,
+            symbol INTEGER NOT NULL REFERENCES symbols (id),
+            PRIMARY KEY (file, symbol)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS translation_units_symbol ON translation_units (symbol);
+    """
+    _columns = ("usr", "qualified_name", "kind", "file", "line", "column", "type")
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self._schema)
+
+    def update(self, file, symbols):
+        """Replaces the symbols of a translation unit.
+
+        :param file: Source file of the translation unit
+        :type file: str
+        :param symbols: Symbols as returned by :func:`clang_bind.symbol_index.get_symbols`
+        :type symbols: list
+        """
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM translation_units WHERE file = ?", (file,)
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO symbols"
+                " (usr, qualified_name, kind, file, line, column, type)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                symbols,
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO translation_units (file, symbol)"
+                " SELECT ?, id FROM symbols"
+                " WHERE usr = ? AND file IS ? AND line = ? AND column = ?",
+                [
+                    (file, usr, symbol_file, line, column)
+                    for usr, _, _, symbol_file, line, column, _ in symbols
+                ],
+            )
+
+    def prune(self):
+        """Drops the symbols no translation unit declares anymore."""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM symbols WHERE id NOT IN"
+                " (SELECT symbol FROM translation_units)"
+            )
+
+    def _select(self, column, value):
+        return [
+            dict(zip(self._columns, row))
+            for row in self.connection.execute(
+                f"SELECT {', '.join(self._columns)} FROM symbols WHERE {column} = ?"
+                " ORDER BY file, line, column",
+                (value,),
+            )
+        ]
+
+    def get_by_usr(self, usr):
+        """Returns the declarations of the symbol.
+
+        :param usr: USR of the symbol
+        :type usr: str
+        :return: Declarations: {"usr", "qualified_name", "kind", "file", "line", "column", "type"}
+        :rtype: list
+        """
+        return self._select("usr", usr)
+
+    def get_by_qualified_name(self, qualified_name):
+        """Returns the declarations of the symbols with this fully qualified name (eg: overloads).
+
+        :param qualified_name: Fully qualified name, eg: `pcl::PointXYZ`
+        :type qualified_name: str
+        :return: Declarations: {"usr", "qualified_name", "kind", "file", "line", "column", "type"}
+        :rtype: list
+        """
+        return self._select("qualified_name", qualified_name)
+
+    def get_qualified_name(self, usr):
+        """Returns the fully qualified name of the symbol.
+
+        :param usr: USR of the symbol
+        :type usr: str
+        :return: Fully qualified name, `None` if the symbol is not indexed
+        :rtype: str
+        """
+        row = self.connection.execute(
+            "SELECT qualified_name FROM symbols WHERE usr = ? LIMIT 1", (usr,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.connection.close()
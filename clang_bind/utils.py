@@ -1,6 +1,17 @@
 import os
+import gzip
 import json
+import lzma
+import hashlib
 import argparse
+from array import array
+
+# Compressions of the output files, by extension: {extension: function opening a file in its format}
+COMPRESSIONS = {
+    # zlib's default level: most of the size reduction of the maximum level, at a fraction of its CPU time
+    ".gz": lambda filename, mode: gzip.open(filename, mode, compresslevel=6),
+    ".xz": lzma.open,
+}
 
 
 def get_realpath(path):
@@ -20,6 +31,39 @@ def join_path(*args):
     return os.path.join(*args)
 
 
+def get_compression_extension(filename):
+    """
+    Returns the compression extension of the file, if any.
+
+    Arguments:
+        - filename: The file name
+
+    Returns:
+        - extension: A key of `COMPRESSIONS`, empty if the file is not compressed
+    """
+
+    _, extension = os.path.splitext(filename)
+    return extension if extension in COMPRESSIONS else ""
+
+
+def open_file(filename, mode="r"):
+    """
+    Opens a text file, compressed or decompressed chunk by chunk if its extension is one of `COMPRESSIONS`.
+
+    Arguments:
+        - filename: The file name
+        - mode: "r" to read, "w" to write
+
+    Returns:
+        - f: The text file object
+    """
+
+    compression = get_compression_extension(str(filename))
+    if compression:
+        return COMPRESSIONS[compression](filename, f"{mode}t")
+    return open(filename, mode)
+
+
 def get_output_path(source, output_dir, split_from, extension):
     """
     Returns json output path after manipulation of the source file's path
@@ -43,9 +87,11 @@ def get_output_path(source, output_dir, split_from, extension):
     # source_filename: contains the source's file name
     relative_dir, source_filename = os.path.split(split_path)
 
-    # filename: contains the output json's file name
-    filename, _ = source_filename.split(".")
-    filename = f"{filename}{extension}"
+    # filename: contains the output json's file name, without the source's (compression and) extension
+    filename = source_filename[
+        : len(source_filename) - len(get_compression_extension(source_filename))
+    ]
+    filename = f"{os.path.splitext(filename)[0]}{extension}"
 
     # dir: final output path
     dir = join_path(output_dir, relative_dir)
@@ -59,15 +105,138 @@ def get_output_path(source, output_dir, split_from, extension):
 
 
 def dump_json(filepath, info, indent=2, separators=None):
-    with open(filepath, "w") as f:
+    if indent is None and separators is None:  # compact
+        separators = (",", ":")
+    with open_file(filepath, "w") as f:
         json.dump(info, f, indent=indent, separators=separators)
 
 
+class JSONStreamWriter:
+    """
+    Writes parsed infos as nested JSON while they are produced, without holding the whole tree in memory.
+
+    - Nodes are written in pre-order, as (depth, info without `members`) pairs; each node's children are written
+      under its `members` key, in the layout `json.dump` writes for the equivalent nested dict.
+    - Only the depths of the nodes on the path to the last written node are held, unless indexing.
+    - The output is ASCII (non-ASCII characters are escaped), so that string lengths are byte offsets.
+
+    Arguments:
+        - f: The file object to write to
+        - indent: The indentation, None for compact output (no whitespace)
+        - index: Record the byte offsets of the nodes in `index`, as (start, end of the node's own keys,
+          index following the node's subtree) triples, eg: for `clang_bind.lazy_json`
+    """
+
+    def __init__(self, f, indent=None, index=False):
+        self.f = f
+        self.indent = indent
+        self.separators = (",", ": ") if indent is not None else (",", ":")
+        # [depth, members started, node index] of the nodes on the path to the last written node
+        self._stack = []
+        self.position = 0  # byte offset of the next write
+        self.node_count = 0
+        self.index = array("Q") if index else None
+
+    def _write(self, text):
+        self.f.write(text)
+        self.position += len(text)
+
+    def _newline(self, level):
+        return "" if self.indent is None else "\n" + " " * (self.indent * level)
+
+    def _end_node(self):
+        depth, members_started, node_index = self._stack.pop()
+        if members_started:
+            self._write(f"{self._newline(2 * depth + 1)}]")
+        else:
+            self._write(
+                f',{self._newline(2 * depth + 1)}"members"{self.separators[1]}[]'
+            )
+        self._write(f"{self._newline(2 * depth)}}}")
+        if self.index is not None:
+            self.index[3 * node_index + 2] = self.node_count
+
+    def write(self, depth, info):
+        """
+        Writes a node.
+
+        Arguments:
+            - depth: The depth of the node, the root's being 0
+            - info: The node's info, without `members`
+        """
+
+        while self._stack and self._stack[-1][0] >= depth:
+            self._end_node()
+        if self._stack:
+            parent = self._stack[-1]
+            if parent[1]:
+                self._write(",")
+            else:
+                parent[1] = True
+                self._write(
+                    f',{self._newline(2 * parent[0] + 1)}"members"{self.separators[1]}['
+                )
+            self._write(self._newline(2 * depth))
+        elif depth:
+            raise ValueError("The first node should be the root")
+        # the node's own keys, left open for `members`
+        header = json.dumps(info, indent=self.indent, separators=self.separators)
+        header = header[:-1].rstrip()
+        if self.indent is not None:
+            header = header.replace("\n", self._newline(2 * depth))
+        start = self.position
+        self._write(header)
+        if self.index is not None:
+            self.index.extend((start, self.position, 0))
+        self._stack.append([depth, False, self.node_count])
+        self.node_count += 1
+
+    def close(self):
+        """
+        Ends the nodes left open.
+        """
+
+        while self._stack:
+            self._end_node()
+
+
+def dump_json_stream(filepath, nodes, indent=None):
+    """
+    Writes parsed infos to a file while they are produced.
+
+    Arguments:
+        - filepath: The output file
+        - nodes: (depth, info without `members`) pairs in pre-order, eg: from `clang_bind.parse.Parse.iter_dicts`
+        - indent: The indentation, None for compact output (no whitespace)
+    """
+
+    with open_file(filepath, "w") as f:
+        writer = JSONStreamWriter(f, indent=indent)
+        for depth, info in nodes:
+            writer.write(depth, info)
+        writer.close()
+
+
 def read_json(filename):
-    with open(filename, "r") as f:
+    with open_file(filename, "r") as f:
         return json.load(f)
 
 
+def get_file_hash(filename):
+    """
+    Returns the hash of a file's contents
+
+    Arguments:
+        - filename: The file to hash
+
+    Returns:
+        - hash: The sha256 hex digest of the file's contents
+    """
+
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
 def write_to_file(filename, linelist):
     with open(filename, "w") as f:
         for line in linelist:
@@ -103,16 +272,141 @@ def parse_arguments(script):
             default=os.path.dirname(os.getcwd()),
             help="Path to split to make output paths shorter",
         )
-        parser.add_argument("files", nargs="+", help="The source files to parse")
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=None,
+            help="Number of parallel workers, defaults to the number of CPUs",
+        )
+        parser.add_argument(
+            "--use-processes",
+            default=False,
+            action="store_true",
+            help="Parse in a pool of processes instead of a pool of threads",
+        )
+        parser.add_argument(
+            "--precompiled_headers",
+            nargs="*",
+            default=None,
+            help="Headers shared by the source files to precompile once per set of compiler arguments, eg: pcl/point_types.h",
+        )
+        parser.add_argument(
+            "--precompiled_headers_path",
+            default=None,
+            help="Output path for precompiled headers, defaults to `pch` in the json output path",
+        )
+        parser.add_argument(
+            "--declarations_only",
+            default=False,
+            action="store_true",
+            help="Skip function bodies, statements and expressions, which are not used for generation",
+        )
+        parser.add_argument(
+            "--generated_kinds_only",
+            default=False,
+            action="store_true",
+            help="Only parse the cursor kinds read while generating, pruning the others with their subtrees",
+        )
+        parser.add_argument(
+            "--owned_paths",
+            nargs="*",
+            default=None,
+            help="Headers (or directories of headers) whose declarations are extracted along with each source file's",
+        )
+        parser.add_argument(
+            "--cache_dir",
+            default=None,
+            help="Directory to cache parse results in, re-parsing only files whose contents changed",
+        )
+        parser.add_argument(
+            "--cache_max_size",
+            type=int,
+            default=5 * 1024,
+            help="Maximum size of the parse cache in MiB",
+        )
+        # Merged outputs refer to each other, re-parsing only some of them could lose declarations
+        incremental_or_merged = parser.add_mutually_exclusive_group()
+        incremental_or_merged.add_argument(
+            "--incremental",
+            default=False,
+            action="store_true",
+            help="Only re-parse the source files whose dependencies changed since the last incremental run",
+        )
+        incremental_or_merged.add_argument(
+            "--merge_declarations",
+            default=False,
+            action="store_true",
+            help="Output the declarations shared by several source files once, and references to them elsewhere",
+        )
+        parser.add_argument(
+            "--dependency_graph_path",
+            default=None,
+            help="Path to keep the dependency graph in between runs, defaults to `dependencies.json` in the json output path",
+        )
+        parser.add_argument(
+            "--symbol_index",
+            default=None,
+            help="Path of an SQLite symbol index to update with the symbols declared in the source files",
+        )
+        parser.add_argument(
+            "--metrics",
+            default=None,
+            help="Path to write performance metrics (json) to, per stage and per source file",
+        )
+        parser.add_argument(
+            "--compact",
+            default=False,
+            action="store_true",
+            help="Write the json outputs without indentation or whitespace",
+        )
+        # Binary outputs are memory-mapped, they can not be compressed
+        binary_or_compressed = parser.add_mutually_exclusive_group()
+        binary_or_compressed.add_argument(
+            "--binary",
+            default=False,
+            action="store_true",
+            help="Write the outputs in the compact binary format instead of json, for generate to memory-map",
+        )
+        binary_or_compressed.add_argument(
+            "--compression",
+            choices=[extension[1:] for extension in COMPRESSIONS],
+            default=None,
+            help="Compress the json outputs while writing them, generate decompresses them by extension",
+        )
+        parser.add_argument(
+            "--json_index",
+            default=False,
+            action="store_true",
+            help="Write an index of byte offsets next to each (uncompressed) json output, for generate to decode it lazily",
+        )
+        parser.add_argument(
+            "files",
+            nargs="*",
+            help="The source files to parse, defaults to all files in the compilation database",
+        )
 
     if script == "generate":
         parser = argparse.ArgumentParser(description="JSON to pybind11 generation")
-        parser.add_argument("files", nargs="+", help="JSON input")
+        parser.add_argument(
+            "files",
+            nargs="+",
+            help="JSON (possibly compressed) or binary input, the format is picked by extension",
+        )
         parser.add_argument(
             "--pybind11_output_path",
             default=os.getcwd(),
             help="Output path for generated cpp",
         )
+        parser.add_argument(
+            "--symbol_index",
+            default=None,
+            help="Path of an SQLite symbol index (built while parsing) to resolve type names with",
+        )
+        parser.add_argument(
+            "--metrics",
+            default=None,
+            help="Path to write performance metrics (json) to, per stage and per input file",
+        )
 
     else:
         args = None
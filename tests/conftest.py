@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from clang_bind.parse import Parse, ParseSession
+
+# Source shared by the tests of the output formats
+SOURCE = """
+namespace pcl {
+struct ABase {};
+struct AStruct : public ABase {
+    int aField;
+    float anArray[3];
+    AStruct(int aParameter) { aField = aParameter; }
+    void aMethod() { if (aField > 0) { aField = -aField; } }
+};
+}
+"""
+
+
+def _write_compilation_database(build_dir, sources):
+    """
+    Writes the sources and a compilation database referring to them.
+
+    Parameters:
+        - build_dir (pathlib.PosixPath): Directory to write the compilation database in
+        - sources (dict): {file name: file contents}, `None` contents are not written
+
+    Returns:
+        - files (list): Paths of the sources
+    """
+
+    files = []
+    for name, contents in sources.items():
+        file = build_dir / name
+        if contents is not None:
+            file.write_text(contents)
+        files.append(str(file))
+    (build_dir / "compile_commands.json").write_text(
+        json.dumps(
+            [
+                {
+                    "directory": str(build_dir),
+                    "command": f"c++ -std=c++14 -c {file}",
+                    "file": file,
+                }
+                for file in files
+            ]
+        )
+    )
+    return files
+
+
+@pytest.fixture
+def write_compilation_database():
+    """
+    Returns the function writing sources and a compilation database referring to them:
+    `write_compilation_database(build_dir, sources)`.
+    """
+
+    return _write_compilation_database
+
+
+@pytest.fixture(scope="session")
+def parse_session():
+    """
+    Returns a session parsing each source in a new translation unit, with one index for all the tests.
+    """
+
+    return ParseSession(max_translation_units=0)
+
+
+@pytest.fixture
+def source():
+    """
+    Returns the source shared by the tests of the output formats.
+    """
+
+    return SOURCE
+
+
+@pytest.fixture
+def parse_source(parse_session, source):
+    """
+    Returns a function parsing the shared source from memory, as `a_file.cpp`: `parse_source()`.
+    """
+
+    return lambda: Parse("a_file.cpp", session=parse_session, source=source)
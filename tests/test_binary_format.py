@@ -0,0 +1,88 @@
+import pytest
+
+import clang_bind.binary_format as binary_format
+import clang_bind.generate as generate
+import clang_bind.utils as utils
+from clang_bind.merge import DeclarationMerger
+from clang_bind.project import ProjectParser
+
+
+class TestBinaryFormat:
+    def test_round_trip(self, tmp_path, parse_source):
+        parser = parse_source()
+        parsed_info = parser.get_dict()
+
+        binary_format.dump(tmp_path / "streamed.bin", parser.iter_dicts())
+        binary_format.dump(
+            tmp_path / "nested.bin", binary_format.iter_nodes(parsed_info)
+        )
+
+        root = binary_format.load(tmp_path / "streamed.bin")
+        assert root == parsed_info
+        assert (tmp_path / "streamed.bin").read_bytes() == (
+            tmp_path / "nested.bin"
+        ).read_bytes()
+        namespace = root["members"][0]
+        assert namespace["cursor"]["spelling"] == "pcl"
+        assert [member["cursor"]["spelling"] for member in namespace["members"]] == [
+            "ABase",
+            "AStruct",
+        ]
+        assert "reference" not in namespace
+        assert "usr" in namespace and "referenced_usr" not in namespace
+
+    def test_smaller_than_json(self, tmp_path, parse_source):
+        parser = parse_source()
+
+        binary_format.dump(tmp_path / "a_file.bin", parser.iter_dicts())
+        utils.dump_json(tmp_path / "a_file.json", parser.get_dict(), indent=None)
+
+        assert (tmp_path / "a_file.bin").stat().st_size < (
+            tmp_path / "a_file.json"
+        ).stat().st_size
+
+    def test_references(self, tmp_path, parse_source):
+        merger = DeclarationMerger()
+        merger.merge("a_file.cpp", parse_source().get_dict(merge_info=True))
+        parsed_info = merger.merge(
+            "another_file.cpp", parse_source().get_dict(merge_info=True)
+        )
+
+        binary_format.dump(
+            tmp_path / "a_file.bin", binary_format.iter_nodes(parsed_info)
+        )
+
+        root = binary_format.load(tmp_path / "a_file.bin")
+        assert root == parsed_info
+        assert root["members"][0]["reference"] == "a_file.cpp"
+
+    def test_generate(self, tmp_path, parse_source):
+        parser = parse_source()
+        utils.dump_json(tmp_path / "a_file.json", parser.get_dict())
+        binary_format.dump(tmp_path / "a_file.bin", parser.iter_dicts())
+
+        assert generate.generate(
+            module_name="pcl", source=str(tmp_path / "a_file.bin")
+        ) == generate.generate(module_name="pcl", source=str(tmp_path / "a_file.json"))
+
+    def test_single_tree(self, tmp_path):
+        with open(tmp_path / "a_file.bin", "wb") as f:
+            writer = binary_format.BinaryWriter(f)
+            with pytest.raises(ValueError):
+                writer.write(1, {})
+
+    def test_not_binary(self, tmp_path):
+        (tmp_path / "a_file.bin").write_text("{}" * 16)
+
+        with pytest.raises(ValueError):
+            binary_format.load(tmp_path / "a_file.bin")
+
+    def test_project_output(self, tmp_path, write_compilation_database, source):
+        files = write_compilation_database(tmp_path, {"a_file.cpp": source})
+
+        (result,) = ProjectParser(tmp_path).parse(
+            output_paths={files[0]: str(tmp_path / "a_file.bin")}
+        )
+
+        (expected,) = ProjectParser(tmp_path).parse()
+        assert binary_format.load(result.output_filepath) == expected.parsed_info
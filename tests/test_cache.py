@@ -0,0 +1,84 @@
+import os
+
+from clang_bind.cache import ParseCache
+from clang_bind.parse import PrecompiledHeaders
+from clang_bind.project import ProjectParser
+
+
+class TestParseCache:
+    def test_miss_then_hit(self, tmp_path, write_compilation_database):
+        write_compilation_database(tmp_path, {"a_file.cpp": "int anInt;"})
+        cache = ParseCache(str(tmp_path / "cache"))
+
+        (missed,) = ProjectParser(tmp_path, cache=cache).parse()
+        (hit,) = ProjectParser(tmp_path, cache=cache).parse()
+
+        assert not missed.cached
+        assert hit.cached
+        assert hit.parsed_info == missed.parsed_info
+        assert cache.get_stats() == {"hits": 1, "misses": 1}
+
+    def test_included_file_modification(self, tmp_path, write_compilation_database):
+        header = tmp_path / "a_header.hpp"
+        header.write_text("struct AStruct {};")
+        write_compilation_database(
+            tmp_path, {"a_file.cpp": '#include "a_header.hpp"\nint anInt;'}
+        )
+        cache = ParseCache(str(tmp_path / "cache"))
+        list(ProjectParser(tmp_path, cache=cache).parse())
+
+        header.write_text("struct AStruct { int aField; };")
+        (result,) = ProjectParser(tmp_path, cache=cache).parse()
+
+        assert not result.cached
+        assert cache.get_stats() == {"hits": 0, "misses": 2}
+
+    def test_precompiled_header(self, tmp_path, write_compilation_database):
+        header = tmp_path / "shared.hpp"
+        header.write_text("#pragma once\nstruct SharedStruct {};")
+        write_compilation_database(
+            tmp_path,
+            {"a_file.cpp": '#include "shared.hpp"\nSharedStruct aVariable;'},
+        )
+        cache = ParseCache(str(tmp_path / "cache"))
+
+        def parse():
+            (result,) = ProjectParser(
+                tmp_path,
+                precompiled_headers=PrecompiledHeaders(
+                    headers=[str(header)], output_dir=str(tmp_path / "pch")
+                ),
+                cache=cache,
+            ).parse()
+            return result
+
+        assert not parse().cached
+        # A rebuilt precompiled header has other contents, from the same headers
+        for path in (tmp_path / "pch").iterdir():
+            path.unlink()
+        assert parse().cached
+
+        header.write_text("#pragma once\nstruct SharedStruct { int aField; };")
+        assert not parse().cached
+
+    def test_options_are_part_of_the_key(self, tmp_path, write_compilation_database):
+        write_compilation_database(tmp_path, {"a_file.cpp": "void aFunction() {}"})
+        cache = ParseCache(str(tmp_path / "cache"))
+        list(ProjectParser(tmp_path, cache=cache).parse())
+
+        (result,) = ProjectParser(tmp_path, cache=cache, declarations_only=True).parse()
+
+        assert not result.cached
+
+    def test_eviction(self, tmp_path):
+        cache = ParseCache(str(tmp_path / "cache"), max_size=1024)
+        for i in range(8):
+            file = tmp_path / f"file_{i}.cpp"
+            file.write_text(f"int anInt{i};")
+            cache.put(str(file), [], [], {"spelling": "x" * 200})
+        least_recently_used = cache._get_entries()[0][2]
+        os.utime(least_recently_used, (0, 0))
+
+        assert cache.evict() > 0
+        assert not os.path.exists(least_recently_used)
+        assert sum(size for _, size, _ in cache._get_entries()) <= 0.9 * 1024
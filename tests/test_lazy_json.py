@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+import clang_bind.generate as generate
+import clang_bind.lazy_json as lazy_json
+import clang_bind.utils as utils
+from clang_bind.project import ProjectParser
+
+
+class TestLazyJSON:
+    def test_round_trip(self, tmp_path, parse_source):
+        parser = parse_source()
+        parsed_info = parser.get_dict()
+
+        for indent in (None, 2):
+            filepath = str(tmp_path / f"a_file_{indent}.json")
+            lazy_json.dump(filepath, parser.iter_dicts(), indent)
+
+            assert lazy_json.is_indexed(filepath)
+            assert utils.read_json(filepath) == parsed_info
+            assert lazy_json.load(filepath) == parsed_info
+
+    def test_lazy_decoding(self, tmp_path, monkeypatch, parse_source):
+        filepath = str(tmp_path / "a_file.json")
+        lazy_json.dump(filepath, parse_source().iter_dicts())
+        decoded = []
+        get_info = lazy_json.LazyJSONReader.get_info
+        monkeypatch.setattr(
+            lazy_json.LazyJSONReader,
+            "get_info",
+            lambda reader, index: decoded.append(index) or get_info(reader, index),
+        )
+
+        root = lazy_json.load(filepath)
+        struct_decl = root["members"][0]["members"][1]
+        assert decoded == []
+        assert struct_decl["cursor"]["spelling"] == "AStruct"
+        assert [member["cursor"]["spelling"] for member in struct_decl["members"]] == [
+            "struct pcl::ABase",
+            "aField",
+            "anArray",
+            "AStruct",
+            "aMethod",
+        ]
+        # Only the struct and its members were decoded, not the function bodies
+        assert len(decoded) == 6
+
+    def test_out_of_date_index(self, tmp_path, parse_source):
+        filepath = str(tmp_path / "a_file.json")
+        lazy_json.dump(filepath, parse_source().iter_dicts())
+
+        utils.dump_json(filepath, parse_source().get_dict())
+
+        assert not lazy_json.is_indexed(filepath)
+        with pytest.raises(ValueError):
+            lazy_json.load(filepath)
+
+    def test_same_size_rewrite(self, tmp_path, parse_source):
+        filepath = tmp_path / "a_file.json"
+        lazy_json.dump(str(filepath), parse_source().iter_dicts())
+        text = filepath.read_text()
+        stat = filepath.stat()
+
+        filepath.write_text(text.replace("aField", "bField"))
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        assert filepath.stat().st_size == stat.st_size
+        assert not lazy_json.is_indexed(str(filepath))
+
+    def test_generate(self, tmp_path, parse_source):
+        parser = parse_source()
+        utils.dump_json(tmp_path / "a_file.json", parser.get_dict())
+        lazy_json.dump(str(tmp_path / "an_indexed_file.json"), parser.iter_dicts())
+
+        assert generate.generate(
+            module_name="pcl", source=str(tmp_path / "an_indexed_file.json")
+        ) == generate.generate(module_name="pcl", source=str(tmp_path / "a_file.json"))
+
+    def test_project_output(self, tmp_path, write_compilation_database, source):
+        files = write_compilation_database(tmp_path, {"a_file.cpp": source})
+        output_paths = {files[0]: str(tmp_path / "a_file.json")}
+
+        (result,) = ProjectParser(tmp_path, json_index=True).parse(
+            output_paths=output_paths
+        )
+        assert lazy_json.is_indexed(result.output_filepath)
+        assert lazy_json.load(result.output_filepath) == utils.read_json(
+            result.output_filepath
+        )
+
+        (result,) = ProjectParser(tmp_path).parse(output_paths=output_paths)
+        assert not lazy_json.is_indexed(result.output_filepath)
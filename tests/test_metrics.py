@@ -0,0 +1,73 @@
+import json
+
+import clang_bind.generate as generate
+from clang_bind.metrics import Metrics
+from clang_bind.parse import Parse
+from clang_bind.project import ProjectParser
+
+
+class TestMetrics:
+    def test_parse_stages(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text("struct AStruct { int aField; };")
+        metrics = Metrics()
+
+        parser = Parse(str(file), verbose=True, metrics=metrics)
+        parsed_info = parser.get_dict()
+        parser.get_parsed_info_from_node_id(parser.tree.root).cursor_info["spelling"]
+        generate.generate(module_name="pcl", parsed_info=parsed_info, metrics=metrics)
+
+        stages = {stage["stage"]: stage for stage in metrics.get_stages()}
+        assert set(stages) == {
+            "parse",
+            "construct_tree",
+            "serialize",
+            "reflection",
+            "generate",
+        }
+        assert stages["construct_tree"]["nodes"] == 3
+        assert stages["serialize"]["nodes"] == 3
+        assert stages["generate"]["nodes"] == 3
+        for stage in stages.values():
+            assert stage["calls"] == 1
+            assert stage["wall_time"] >= 0
+            assert stage["cpu_time"] >= 0
+        assert stages["construct_tree"]["nodes_per_second"] > 0
+
+    def test_worker_processes(self, tmp_path, write_compilation_database):
+        files = write_compilation_database(
+            tmp_path, {f"file_{i}.cpp": "int anInt;" for i in range(2)}
+        )
+        metrics = Metrics()
+
+        list(ProjectParser(tmp_path, use_processes=True, metrics=metrics).parse())
+
+        records = metrics.get_records()
+        assert {(record["stage"], record["file"]) for record in records} == {
+            (stage, file)
+            for stage in ("parse", "construct_tree", "serialize")
+            for file in files
+        }
+        (parse,) = [
+            stage for stage in metrics.get_stages() if stage["stage"] == "parse"
+        ]
+        assert parse["calls"] == 2
+
+    def test_dump(self, tmp_path):
+        metrics = Metrics()
+        with metrics.measure("a_stage", file="a_file") as counts:
+            counts["nodes"] = 4
+        with metrics.measure("a_stage", file="a_file"):
+            pass
+
+        metrics.dump(str(tmp_path / "metrics.json"))
+
+        dumped = json.loads((tmp_path / "metrics.json").read_text())
+        (record,) = dumped["files"]
+        assert record["file"] == "a_file"
+        assert record["calls"] == 2
+        assert record["nodes"] == 4
+        (stage,) = dumped["stages"]
+        assert stage["stage"] == "a_stage"
+        assert "file" not in stage
+        assert dumped["process_peak_rss"] == record["process_peak_rss"]
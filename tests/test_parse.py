@@ -1,18 +1,35 @@
-import tempfile
+import inspect
+import os
+import sys
+import threading
 
 import clang.cindex as clang
-from clang_bind.parse import Parse
+import clang_bind.generate as generate
+import clang_bind.parse as parse
+import clang_bind.utils as utils
+from clang_bind.clang_utils import (
+    ClangUtils,
+    get_reflection_plan,
+    getmembers_static,
+    ignore_list,
+)
+from clang_bind.parse import (
+    Parse,
+    ParsedInfo,
+    ParseSession,
+    PrecompiledHeaders,
+    iter_parse,
+    parse_sources,
+)
 
 
 class TestParse:
     parser, tree, tree_paths = None, None, None
-    file = tempfile.NamedTemporaryFile(suffix=".cpp")
+    filename = "a_file.cpp"  # virtual file, parsed from memory
+    session = ParseSession(max_translation_units=0)  # one index for all the tests
 
     def _parse(self, file_contents):
-        self.file.write(bytes(file_contents, "utf-8"))  # write to temp file
-        self.file.seek(0)
-
-        self.parser = Parse(self.file.name)
+        self.parser = Parse(self.filename, session=self.session, source=file_contents)
         self.tree = self.parser.get_tree()  # parse the file to get an AST
         self.tree_paths = [
             self.parser.get_parsed_infos_from_node_ids(path)
@@ -57,7 +74,7 @@ class TestParse:
 
         tranlation_unit = self.tree_paths[0][0]
         assert tranlation_unit.cursor.kind == clang.CursorKind.TRANSLATION_UNIT
-        assert tranlation_unit.cursor.spelling == self.file.name
+        assert tranlation_unit.cursor.spelling == self.filename
 
     def test_namespace(self):
         self._parse("namespace a_namespace {}")
@@ -402,3 +419,642 @@ class TestParse:
         assert delete_constructor.cursor.spelling == "aClass"
         assert delete_constructor.cursor.result_type.kind == clang.TypeKind.VOID
         # no check available for deleted ctor analogous to `is_default_constructor`
+
+    def test_declarations_only(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(
+            """
+        int aFunction(int aParam) {
+            return aParam + 1;
+        }
+        int anInt = aFunction(1);
+        """
+        )
+
+        parser = Parse(str(file), declarations_only=True)
+        function_decl, var_decl = parser.get_dict()["members"]
+
+        assert function_decl["cursor_kind"]["name"] == "FUNCTION_DECL"
+        assert [
+            member["cursor_kind"]["name"] for member in function_decl["members"]
+        ] == ["PARM_DECL"]
+        assert var_decl["cursor_kind"]["name"] == "VAR_DECL"
+        assert var_decl["members"] == []
+
+    def test_deep_nesting(self, tmp_path):
+        depth = sys.getrecursionlimit() + 100
+        file = tmp_path / "a_file.cpp"
+        file.write_text("namespace a {" * depth + "}" * depth)
+
+        parser = Parse(str(file), [f"-fbracket-depth={depth + 1}"])
+
+        assert parser.get_tree().depth() == depth
+        parsed_info = parser.get_dict()
+        for _ in range(depth):
+            (parsed_info,) = parsed_info["members"]
+        assert parsed_info["depth"] == depth
+        assert parsed_info["cursor"]["spelling"] == "a"
+        utils.dump_json_stream(tmp_path / "a_file.json", parser.iter_dicts())
+        assert (tmp_path / "a_file.json").read_text().count('"members"') == depth + 1
+
+    def test_compact_tree(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(
+            """
+        namespace a_namespace {
+            struct AStruct {
+                AStruct(int aParam, double anotherParam) {}
+                void aMethod();
+                int aField;
+            };
+            int aFunction(int aParam);
+        }
+        """
+        )
+
+        parser = Parse(str(file))
+        compact_parser = Parse(str(file), compact=True)
+        tree_paths = [
+            parser.get_parsed_infos_from_node_ids(path)
+            for path in parser.get_tree().paths_to_leaves()
+        ]
+        compact_tree_paths = [
+            compact_parser.get_parsed_infos_from_node_ids(path)
+            for path in compact_parser.get_tree().paths_to_leaves()
+        ]
+
+        assert compact_parser.get_dict() == parser.get_dict()
+        assert list(map(repr, compact_tree_paths)) == list(map(repr, tree_paths))
+        struct_decl = compact_tree_paths[0][2]
+        assert [
+            repr(parsed_info)
+            for parsed_info in compact_parser.get_children_parsed_infos_from_parent_parsed_info(
+                struct_decl
+            )
+        ] == ["CONSTRUCTOR:'AStruct'", "CXX_METHOD:'aMethod'", "FIELD_DECL:'aField'"]
+
+    def test_node_id_from_parsed_info(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text("struct AStruct { int aField; double anotherField; };")
+
+        for compact in (False, True):
+            parser = Parse(str(file), compact=compact)
+            for node_id in parser.get_tree().expand_tree():
+                parsed_info = parser.get_parsed_info_from_node_id(node_id)
+                assert parser.get_node_id_from_parsed_info(parsed_info) == node_id
+            # parsed infos not created by the parser are searched by value
+            root_cursor = parser.get_parsed_info_from_node_id(
+                parser.get_tree().root
+            ).cursor
+            assert (
+                parser.get_node_id_from_parsed_info(ParsedInfo(root_cursor))
+                == parser.get_tree().root
+            )
+
+    def test_verbose_parsed_info(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text("int anInt;")
+
+        parser = Parse(str(file), verbose=True)
+        var_decl = parser.get_children_parsed_infos_from_parent_parsed_info(
+            parser.get_parsed_info_from_node_id(parser.get_tree().root)
+        )[0]
+
+        assert var_decl._cursor_info is None  # computed on first access only
+        assert var_decl.cursor_info["spelling"] == "anInt"
+        assert var_decl.cursor_info is var_decl.cursor_info
+        assert var_decl.cursor_kind_info["is_declaration"]
+        assert var_decl.type_info["kind"] == clang.TypeKind.INT
+        assert not hasattr(ParsedInfo(var_decl.cursor), "cursor_info")
+        assert not hasattr(var_decl, "__dict__")
+
+    def test_lazy_cursor_info(self, tmp_path, monkeypatch):
+        file = tmp_path / "a_file.cpp"
+        file.write_text("int anInt;")
+        called = []
+        get_getters = parse._get_getters
+        monkeypatch.setattr(
+            parse,
+            "_get_getters",
+            lambda cls: {
+                name: lambda object, name=name, getter=getter: called.append(name)
+                or getter(object)
+                for name, getter in get_getters(cls).items()
+            },
+        )
+
+        parser = Parse(str(file), verbose=True)
+        var_decl = parser.get_children_parsed_infos_from_parent_parsed_info(
+            parser.get_parsed_info_from_node_id(parser.get_tree().root)
+        )[0]
+
+        assert var_decl.cursor_info["spelling"] == "anInt"
+        assert var_decl.cursor_info["spelling"] == "anInt"
+        # Only the getter of the key read was called, once: not `get_tokens`, `get_children`, ...
+        assert called == ["spelling"]
+        assert set(var_decl.cursor_info) == set(
+            ClangUtils(var_decl.cursor).get_all_functions_dict()
+        )
+        assert {"get_tokens", "get_children", "get_arguments"} <= set(called)
+
+    def test_reflection_plan(self):
+        self._parse("int anInt;")
+        var_decl = self.tree_paths[0][1].cursor
+
+        plan = get_reflection_plan(type(var_decl))
+
+        # Same members as classifying the object's own members
+        assert {name for functions in plan for name, _ in functions} == {
+            name
+            for name, member in getmembers_static(var_decl)
+            if name not in ignore_list
+            and (
+                (inspect.isfunction(member) and name.startswith(("is_", "get_")))
+                or isinstance(member, property)
+            )
+        }
+        assert get_reflection_plan(clang.Cursor) is plan
+        assert ClangUtils(var_decl).get_all_functions_dict()["spelling"] == "anInt"
+
+    def test_interned_verbose_info(self):
+        self.parser = Parse(
+            self.filename,
+            session=self.session,
+            source="int anInt; int anotherInt; float aFloat;",
+            verbose=True,
+        )
+        an_int, another_int, a_float = self.parser.get_parsed_infos_from_node_ids(
+            self.parser.get_tree().is_branch(self.parser.get_tree().root)
+        )
+
+        assert an_int.type_id == another_int.type_id != a_float.type_id
+        assert an_int.type_info is another_int.type_info
+        assert a_float.type_info["kind"] == clang.TypeKind.FLOAT
+        assert len(self.parser.type_table) == 2
+        assert an_int.cursor_kind_info is a_float.cursor_kind_info
+
+    def test_owned_files(self, tmp_path):
+        include_dir = tmp_path / "include"
+        (include_dir / "project").mkdir(parents=True)
+        (include_dir / "project" / "a_header.hpp").write_text("struct AStruct {};")
+        (include_dir / "foreign.hpp").write_text("struct AForeignStruct {};")
+        file = tmp_path / "a_file.cpp"
+        file.write_text(
+            "#include <foreign.hpp>\n#include <project/a_header.hpp>\nAStruct aVariable;"
+        )
+        compiler_arguments = [f"-I{include_dir}"]
+
+        parser = Parse(str(file), compiler_arguments)
+        owning_parser = Parse(
+            str(file),
+            compiler_arguments,
+            owned_files=[str(include_dir / "project")],
+        )
+
+        assert [
+            repr(parsed_info)
+            for parsed_info in parser.get_children_parsed_infos_from_parent_parsed_info(
+                parser.get_parsed_info_from_node_id(parser.get_tree().root)
+            )
+        ] == [
+            "INCLUSION_DIRECTIVE:'foreign.hpp'",
+            "INCLUSION_DIRECTIVE:'project/a_header.hpp'",
+            "VAR_DECL:'aVariable'",
+        ]
+        assert [
+            repr(parsed_info)
+            for parsed_info in owning_parser.get_children_parsed_infos_from_parent_parsed_info(
+                owning_parser.get_parsed_info_from_node_id(
+                    owning_parser.get_tree().root
+                )
+            )
+        ] == [
+            "INCLUSION_DIRECTIVE:'foreign.hpp'",
+            "INCLUSION_DIRECTIVE:'project/a_header.hpp'",
+            "STRUCT_DECL:'AStruct'",
+            "VAR_DECL:'aVariable'",
+        ]
+
+    def test_query(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(
+            """
+            class AClass { void aMethod(); void anotherMethod(); };
+            class AnotherClass { void aMethod(); };
+            """
+        )
+
+        for compact in (False, True):
+            parser = Parse(str(file), compact=compact)
+            assert parser._indexes is None  # built on the first query only
+
+            def query(**kwargs):
+                return [
+                    repr(parsed_info)
+                    for parsed_info in parser.get_parsed_infos_from_node_ids(
+                        parser.query(**kwargs)
+                    )
+                ]
+
+            assert query(kind="CXX_METHOD") == [
+                "CXX_METHOD:'aMethod'",
+                "CXX_METHOD:'anotherMethod'",
+                "CXX_METHOD:'aMethod'",
+            ]
+            assert query(spelling="aMethod", kind=clang.CursorKind.CXX_METHOD) == [
+                "CXX_METHOD:'aMethod'",
+                "CXX_METHOD:'aMethod'",
+            ]
+            assert query(
+                kind="CXX_METHOD",
+                within=parser.query(kind="CLASS_DECL", spelling="AnotherClass"),
+            ) == ["CXX_METHOD:'aMethod'"]
+            classes = parser.query(kind="CLASS_DECL")
+            assert query(within=classes) == [
+                "CXX_METHOD:'aMethod'",
+                "CXX_METHOD:'anotherMethod'",
+                "CXX_METHOD:'aMethod'",
+            ]
+            # Nested and repeated ancestors, nodes are not their own descendants
+            assert query(
+                kind="CLASS_DECL", within=[parser.get_tree().root] + classes * 2
+            ) == ["CLASS_DECL:'AClass'", "CLASS_DECL:'AnotherClass'"]
+            assert query(within=classes[1]) == ["CXX_METHOD:'aMethod'"]
+            assert query(kind="STRUCT_DECL") == []
+            assert len(parser.query()) == parser.get_tree().size()
+
+    def test_allowed_and_ignored_kinds(self):
+        source = """
+        struct AStruct {
+            int aField;
+            int aMethod(int aParameter) { return aParameter + 1; }
+        };
+        """
+
+        allowed = Parse(
+            self.filename,
+            session=self.session,
+            source=source,
+            allowed_kinds=["STRUCT_DECL", clang.CursorKind.CXX_METHOD],
+        )
+        ignored = Parse(
+            self.filename,
+            session=self.session,
+            source=source,
+            ignored_kinds=["CXX_METHOD"],
+        )
+
+        assert [
+            repr(parsed_info)
+            for parsed_info in allowed.get_parsed_infos_from_node_ids(
+                allowed.tree.expand_tree()
+            )
+        ] == [
+            f"TRANSLATION_UNIT:'{self.filename}'",
+            "STRUCT_DECL:'AStruct'",
+            "CXX_METHOD:'aMethod'",
+        ]
+        assert [
+            repr(parsed_info)
+            for parsed_info in ignored.get_parsed_infos_from_node_ids(
+                ignored.tree.expand_tree()
+            )
+        ] == [
+            f"TRANSLATION_UNIT:'{self.filename}'",
+            "STRUCT_DECL:'AStruct'",
+            "FIELD_DECL:'aField'",
+        ]
+
+    def test_generated_kinds(self):
+        source = """
+        namespace pcl {
+        struct AStruct {
+            float aField;
+            AStruct(float aParameter) { aField = aParameter * 2; }
+            void aMethod() { if (aField > 0) { aField = -aField; } }
+        };
+        }
+        """
+
+        parser = Parse(self.filename, session=self.session, source=source)
+        pruned_parser = Parse(
+            self.filename,
+            session=self.session,
+            source=source,
+            allowed_kinds=generate.GENERATED_KINDS,
+        )
+
+        def generate_lines(parser):
+            lines = generate.generate(module_name="pcl", parsed_info=parser.get_dict())
+            return [line for line in lines if line]  # pruned nodes end no scope
+
+        assert pruned_parser.get_tree().size() < parser.get_tree().size()
+        assert generate_lines(pruned_parser) == generate_lines(parser)
+
+    def test_stream_json(self, tmp_path):
+        self._parse(
+            """
+        namespace pcl {
+        struct AStruct : public ABase {
+            int aField;
+            void aMethod(int aParameter) { aField = aParameter; }
+        };
+        }
+        """
+        )
+
+        parsed_info = self.parser.get_dict()
+        for indent in (None, 2):
+            stream_path, dump_path = tmp_path / "stream.json", tmp_path / "dump.json"
+            utils.dump_json_stream(stream_path, self.parser.iter_dicts(), indent)
+            utils.dump_json(dump_path, parsed_info, indent)
+            assert stream_path.read_text() == dump_path.read_text()
+
+    def test_optional_usr(self):
+        self._parse("struct AStruct;\nstruct AStruct {};\nAStruct aVariable;")
+
+        declaration, definition, var_decl = self.parser.get_dict()["members"]
+        type_ref = var_decl["members"][0]
+        assert declaration["usr"] == definition["usr"] == "c:@S@AStruct"
+        assert "referenced_usr" not in declaration
+        assert type_ref["referenced_usr"] == "c:@S@AStruct"
+        assert "usr" not in type_ref
+        assert "file" not in declaration
+
+        declaration, definition, var_decl = self.parser.get_dict(merge_info=True)[
+            "members"
+        ]
+        assert declaration["file"] == definition["file"] == self.filename
+        assert not declaration["definition"] and definition["definition"]
+        assert "file" not in var_decl["members"][0]
+
+    def test_get_view(self):
+        source = """
+        namespace pcl {
+        struct AStruct : public ABase {
+            int aField;
+            AStruct(int aParameter) { aField = aParameter; }
+            void aMethod() {}
+        };
+        }
+        """
+
+        for compact in (False, True):
+            parser = Parse(
+                self.filename, session=self.session, source=source, compact=compact
+            )
+            view, parsed_info = parser.get_view(), parser.get_dict()
+
+            assert view == parsed_info
+            assert generate.generate(
+                module_name="pcl", parsed_info=view
+            ) == generate.generate(module_name="pcl", parsed_info=parsed_info)
+
+
+class TestIterParse:
+    file_contents = """
+        namespace a_namespace {
+            struct AStruct {
+                void aMethod(int aParam) { int aVariable = aParam; }
+                int aField;
+            };
+            int aFunction(int aParam);
+        }
+        """
+
+    def test_same_as_tree(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(self.file_contents)
+        parser = Parse(str(file), compact=True)
+        tree = parser.get_tree()
+
+        streamed = list(iter_parse(str(file)))
+
+        assert [parsed_info.node_id for _, _, parsed_info in streamed] == list(
+            tree.expand_tree()
+        )
+        for depth, parent_node_id, parsed_info in streamed:
+            assert depth == tree.level(parsed_info.node_id)
+            assert parent_node_id == tree.parent(parsed_info.node_id)
+            assert repr(parsed_info) == repr(
+                parser.get_parsed_info_from_node_id(parsed_info.node_id)
+            )
+
+    def test_kinds_and_prune_kinds(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(self.file_contents)
+
+        streamed = iter_parse(
+            str(file),
+            kinds={clang.CursorKind.FUNCTION_DECL, clang.CursorKind.CXX_METHOD},
+            prune_kinds={clang.CursorKind.STRUCT_DECL},
+        )
+
+        assert [repr(parsed_info) for _, _, parsed_info in streamed] == [
+            "FUNCTION_DECL:'aFunction'"
+        ]
+
+    def test_kind_names(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(self.file_contents)
+
+        streamed = iter_parse(
+            str(file),
+            kinds={"FUNCTION_DECL", "CXX_METHOD"},
+            prune_kinds={"STRUCT_DECL"},
+        )
+
+        assert [repr(parsed_info) for _, _, parsed_info in streamed] == [
+            "FUNCTION_DECL:'aFunction'"
+        ]
+
+    def test_allowed_and_ignored_kinds(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(self.file_contents)
+        options = {
+            "allowed_kinds": ["NAMESPACE", "STRUCT_DECL", "CXX_METHOD", "FIELD_DECL"],
+            "ignored_kinds": [clang.CursorKind.FIELD_DECL],
+        }
+        tree = Parse(str(file), compact=True, **options).get_tree()
+
+        streamed = list(iter_parse(str(file), **options))
+
+        assert [parsed_info.node_id for _, _, parsed_info in streamed] == list(
+            tree.expand_tree()
+        )
+        assert [repr(parsed_info) for _, _, parsed_info in streamed[1:]] == [
+            "NAMESPACE:'a_namespace'",
+            "STRUCT_DECL:'AStruct'",
+            "CXX_METHOD:'aMethod'",
+        ]
+
+    def test_early_stop(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text(self.file_contents)
+
+        threads = set(threading.enumerate())
+        streamed = iter_parse(str(file), batch_size=1)
+        first = [next(streamed) for _ in range(3)]
+        walkers = set(threading.enumerate()) - threads
+        streamed.close()
+
+        assert [parsed_info.node_id for _, _, parsed_info in first] == [0, 1, 2]
+        # The walker thread of the generator is done
+        assert len(walkers) == 1
+        assert not any(walker.is_alive() for walker in walkers)
+
+
+class TestParseSession:
+    def test_translation_unit_reuse(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text("int anInt;")
+        session = ParseSession()
+
+        translation_unit = session.get_translation_unit(str(file))
+        parser = Parse(str(file), session=session)
+
+        assert session.get_translation_unit(str(file)) is translation_unit
+        assert parser.get_dict()["members"][0]["cursor"]["spelling"] == "anInt"
+
+    def test_reparse_on_modification(self, tmp_path):
+        file = tmp_path / "a_file.cpp"
+        file.write_text("int anInt;")
+        session = ParseSession()
+        translation_unit = session.get_translation_unit(str(file))
+
+        file.write_text("int anotherInt;")
+        os.utime(file, (0, 0))  # ensure a different modification time
+
+        parser = Parse(str(file), session=session)
+
+        assert session.get_translation_unit(str(file)) is translation_unit
+        assert parser.get_dict()["members"][0]["cursor"]["spelling"] == "anotherInt"
+
+    def test_lru_eviction(self, tmp_path):
+        files = [tmp_path / f"file_{i}.cpp" for i in range(3)]
+        for file in files:
+            file.write_text("int anInt;")
+        session = ParseSession(max_translation_units=2)
+
+        first_translation_unit = session.get_translation_unit(str(files[0]))
+        session.get_translation_unit(str(files[1]))
+        session.get_translation_unit(str(files[2]))
+
+        assert session.get_translation_unit(str(files[0])) is not first_translation_unit
+
+    def test_reparse_on_source_change(self):
+        session = ParseSession()
+        translation_unit = session.get_translation_unit(
+            "a_file.cpp", source="int anInt;"
+        )
+
+        parser = Parse("a_file.cpp", session=session, source="int anotherInt;")
+
+        assert (
+            session.get_translation_unit("a_file.cpp", source="int anotherInt;")
+            is translation_unit
+        )
+        assert parser.get_dict()["members"][0]["cursor"]["spelling"] == "anotherInt"
+
+
+class TestParseSources:
+    def test_batch(self):
+        parsers = list(
+            parse_sources(
+                [("snippet.cpp", f"int anInt{i};") for i in range(3)],
+                compiler_arguments=["-std=c++14"],
+            )
+        )
+
+        # Trees of a reused virtual filename stay valid
+        assert [
+            parser.get_dict()["members"][0]["cursor"]["spelling"] for parser in parsers
+        ] == ["anInt0", "anInt1", "anInt2"]
+        assert len({id(parser.translation_unit.index) for parser in parsers}) == 1
+
+    def test_iter_parse(self):
+        streamed = list(iter_parse("a_file.cpp", source="int anInt;"))
+
+        assert [repr(parsed_info) for _, _, parsed_info in streamed] == [
+            "TRANSLATION_UNIT:'a_file.cpp'",
+            "VAR_DECL:'anInt'",
+        ]
+
+
+class TestPrecompiledHeaders:
+    def test_shared_precompiled_header(self, tmp_path):
+        include_dir = tmp_path / "include"
+        include_dir.mkdir()
+        (include_dir / "shared.hpp").write_text(
+            "#pragma once\nstruct SharedStruct { int aField; };"
+        )
+        files = [tmp_path / f"file_{i}.cpp" for i in range(2)]
+        for i, file in enumerate(files):
+            file.write_text(f"#include <shared.hpp>\nSharedStruct aVariable{i};")
+        precompiled_headers = PrecompiledHeaders(
+            headers=["shared.hpp"], output_dir=str(tmp_path / "pch")
+        )
+        session = ParseSession()
+
+        parsers = [
+            Parse(
+                str(file),
+                [f"-I{include_dir}", "-c", "-o", f"{file}.o"],
+                session=session,
+                precompiled_headers=precompiled_headers,
+            )
+            for file in files
+        ]
+
+        assert not precompiled_headers.errors
+        assert len(list((tmp_path / "pch").glob("*.pch"))) == 1
+        for i, parser in enumerate(parsers):
+            var_decl = parser.get_dict()["members"][-1]
+            assert var_decl["cursor_kind"]["name"] == "VAR_DECL"
+            assert var_decl["cursor"]["spelling"] == f"aVariable{i}"
+            assert var_decl["type"]["kind"] != "Invalid"
+
+    def test_reuse_precompiled_header(self, tmp_path):
+        include_dir = tmp_path / "include"
+        include_dir.mkdir()
+        header = include_dir / "shared.hpp"
+        header.write_text("#pragma once\nstruct SharedStruct { int aField; };")
+        compiler_arguments = [f"-I{include_dir}"]
+
+        def get_compiler_arguments():
+            precompiled_headers = PrecompiledHeaders(
+                headers=["shared.hpp"], output_dir=str(tmp_path / "pch")
+            )
+            return precompiled_headers.get_compiler_arguments(compiler_arguments)
+
+        path = get_compiler_arguments()[-1]
+        assert str(header) in PrecompiledHeaders.get_inputs(path)
+        built = os.stat(path).st_mtime_ns
+
+        # Another run (or process) reuses the precompiled header
+        assert get_compiler_arguments()[-1] == path
+        assert os.stat(path).st_mtime_ns == built
+
+        # Until one of its inputs changes
+        header.write_text("#pragma once\nstruct SharedStruct { int anotherField; };")
+        assert get_compiler_arguments()[-1] == path
+        assert os.stat(path).st_mtime_ns != built
+
+    def test_precompiled_header_errors(self, tmp_path):
+        include_dir = tmp_path / "include"
+        include_dir.mkdir()
+        (include_dir / "shared.hpp").write_text("struct SharedStruct { int aField }")
+        file = tmp_path / "a_file.cpp"
+        file.write_text("int aVariable;")
+        precompiled_headers = PrecompiledHeaders(
+            headers=["shared.hpp"], output_dir=str(tmp_path / "pch")
+        )
+
+        parser = Parse(
+            str(file), [f"-I{include_dir}"], precompiled_headers=precompiled_headers
+        )
+
+        assert len(precompiled_headers.errors) == 1
+        assert not list((tmp_path / "pch").iterdir())
+        var_decl = parser.get_dict()["members"][-1]
+        assert var_decl["cursor"]["spelling"] == "aVariable"
@@ -0,0 +1,307 @@
+import json
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+import clang_bind.generate as generate
+import clang_bind.project as project
+import clang_bind.utils as utils
+from clang_bind.dependency_graph import DependencyGraph
+from clang_bind.parse import Parse, PrecompiledHeaders
+from clang_bind.project import ProjectParser
+
+
+class TestProjectParser:
+    def test_deterministic_order(self, tmp_path, write_compilation_database):
+        files = write_compilation_database(
+            tmp_path,
+            {
+                f"file_{i}.cpp": f"struct AStruct{i} {{ int aField; }};"
+                for i in reversed(range(8))
+            },
+        )
+
+        results = list(ProjectParser(tmp_path, jobs=4).parse())
+
+        assert [result.file for result in results] == sorted(files)
+        for i, result in enumerate(results):
+            assert result.error is None
+            struct_decl = result.parsed_info["members"][0]
+            assert struct_decl["cursor_kind"]["name"] == "STRUCT_DECL"
+            assert struct_decl["cursor"]["spelling"] == f"AStruct{i}"
+            assert struct_decl["members"][0]["cursor"]["spelling"] == "aField"
+
+    def test_error_isolation(self, tmp_path, write_compilation_database):
+        write_compilation_database(
+            tmp_path, {"missing.cpp": None, "present.cpp": "int anInt;"}
+        )
+
+        missing, present = ProjectParser(tmp_path, jobs=2).parse()
+
+        assert missing.parsed_info is None
+        assert missing.error
+        assert present.error is None
+        assert present.parsed_info["members"][0]["cursor"]["spelling"] == "anInt"
+
+    def test_process_pool(self, tmp_path, write_compilation_database):
+        write_compilation_database(tmp_path, {"a_file.cpp": "int anInt;"})
+
+        (result,) = ProjectParser(tmp_path, jobs=2, use_processes=True).parse()
+
+        assert result.error is None
+        assert result.parsed_info["members"][0]["cursor"]["spelling"] == "anInt"
+
+    @pytest.mark.skipif(
+        multiprocessing.get_start_method() != "fork",
+        reason="The crash is patched in before the workers are forked",
+    )
+    def test_worker_crash(self, tmp_path, write_compilation_database, monkeypatch):
+        files = write_compilation_database(
+            tmp_path, {f"file_{i}.cpp": f"int anInt{i};" for i in range(4)}
+        )
+
+        def parse(file, *args, **kwargs):
+            if file == files[1]:
+                os._exit(1)  # as on a crash in libclang, in the forked worker
+            return Parse(file, *args, **kwargs)
+
+        monkeypatch.setattr(project, "Parse", parse)
+
+        results = list(ProjectParser(tmp_path, jobs=2, use_processes=True).parse())
+
+        assert [result.file for result in results] == files
+        assert [bool(result.error) for result in results] == [False, True, False, False]
+        assert results[1].error.startswith("BrokenProcessPool")
+        assert results[3].parsed_info["members"][0]["cursor"]["spelling"] == "anInt3"
+
+    def test_incremental_parse(self, tmp_path, write_compilation_database):
+        (tmp_path / "a_header.hpp").write_text("struct AStruct {};")
+        write_compilation_database(
+            tmp_path,
+            {
+                "including.cpp": '#include "a_header.hpp"\nAStruct aStruct;',
+                "standalone.cpp": "int anInt;",
+            },
+        )
+        graph_path = str(tmp_path / "dependencies.json")
+
+        def parse():
+            return list(
+                ProjectParser(
+                    tmp_path, dependency_graph=DependencyGraph(graph_path)
+                ).parse()
+            )
+
+        assert len(parse()) == 2
+        assert parse() == []
+
+        # Only touched: unchanged contents
+        os.utime(tmp_path / "a_header.hpp", (0, 0))
+        assert parse() == []
+
+        (tmp_path / "a_header.hpp").write_text("struct AStruct { int aField; };")
+        (result,) = parse()
+        assert result.file == str(tmp_path / "including.cpp")
+        assert parse() == []
+
+    def test_incremental_parse_options(self, tmp_path, write_compilation_database):
+        (file,) = write_compilation_database(tmp_path, {"a_file.cpp": "int anInt;"})
+        graph_path = str(tmp_path / "dependencies.json")
+
+        def parse(output_path, **kwargs):
+            return list(
+                ProjectParser(
+                    tmp_path, dependency_graph=DependencyGraph(graph_path), **kwargs
+                ).parse(output_paths={file: str(tmp_path / output_path)})
+            )
+
+        assert len(parse("a_file.json")) == 1
+        assert parse("a_file.json") == []
+        assert len(parse("a_file.json", declarations_only=True)) == 1
+        assert len(parse("a_file.bin", declarations_only=True)) == 1
+        assert len(parse("a_file.bin", declarations_only=True, indent=None)) == 1
+        assert parse("a_file.bin", declarations_only=True, indent=None) == []
+
+    def test_incremental_parse_with_precompiled_header(
+        self, tmp_path, write_compilation_database
+    ):
+        header = tmp_path / "shared.hpp"
+        header.write_text("#pragma once\nstruct SharedStruct {};")
+        write_compilation_database(
+            tmp_path,
+            {"a_file.cpp": '#include "shared.hpp"\nSharedStruct aVariable;'},
+        )
+        graph_path = str(tmp_path / "dependencies.json")
+
+        def parse():
+            return list(
+                ProjectParser(
+                    tmp_path,
+                    precompiled_headers=PrecompiledHeaders(
+                        headers=[str(header)], output_dir=str(tmp_path / "pch")
+                    ),
+                    dependency_graph=DependencyGraph(graph_path),
+                ).parse()
+            )
+
+        (result,) = parse()
+        assert str(header) in result.includes
+        assert parse() == []
+
+        header.write_text("#pragma once\nstruct SharedStruct { int aField; };")
+        (result,) = parse()
+        assert result.error is None
+
+    def test_incremental_parse_retries_errors(
+        self, tmp_path, write_compilation_database
+    ):
+        write_compilation_database(tmp_path, {"missing.cpp": None})
+        graph_path = str(tmp_path / "dependencies.json")
+
+        for _ in range(2):
+            (result,) = ProjectParser(
+                tmp_path, dependency_graph=DependencyGraph(graph_path)
+            ).parse()
+            assert result.error
+
+    def test_merge_declarations(self, tmp_path, write_compilation_database):
+        (tmp_path / "a_header.hpp").write_text("struct AStruct { int aField; };")
+        files = write_compilation_database(
+            tmp_path,
+            {
+                f"file_{i}.cpp": f'#include "a_header.hpp"\nint anInt{i};'
+                for i in range(2)
+            },
+        )
+
+        owning, referring = ProjectParser(
+            tmp_path,
+            owned_files=[str(tmp_path / "a_header.hpp")],
+            merge_declarations=True,
+        ).parse()
+
+        owned_struct = owning.parsed_info["members"][1]
+        referenced_struct = referring.parsed_info["members"][1]
+        assert owned_struct["cursor"]["spelling"] == "AStruct"
+        assert owned_struct["members"][0]["cursor"]["spelling"] == "aField"
+        assert referenced_struct["usr"] == owned_struct["usr"]
+        assert referenced_struct["reference"] == files[0]
+        assert referenced_struct["members"] == []
+        # Merge info is not part of the output
+        assert "file" not in owned_struct and "file" not in referenced_struct
+        # Declarations of each file are kept
+        assert referring.parsed_info["members"][2]["cursor"]["spelling"] == "anInt1"
+
+        lines = generate.generate(module_name="pcl", parsed_info=referring.parsed_info)
+        assert not any("AStruct" in line for line in lines)
+
+    def test_merge_declarations_in_different_headers(
+        self, tmp_path, write_compilation_database
+    ):
+        # Same USR and location, but a declaration in one header and the definition in another
+        (tmp_path / "fwd.hpp").write_text("struct Foo;")
+        (tmp_path / "def.hpp").write_text("struct Foo { int a; };")
+        write_compilation_database(
+            tmp_path,
+            {
+                "file_0.cpp": '#include "fwd.hpp"',
+                "file_1.cpp": '#include "def.hpp"',
+            },
+        )
+
+        declaring, defining = ProjectParser(
+            tmp_path, owned_files=[str(tmp_path)], merge_declarations=True
+        ).parse()
+
+        (declaration,) = declaring.parsed_info["members"][1:]
+        (definition,) = defining.parsed_info["members"][1:]
+        assert declaration["usr"] == definition["usr"]
+        assert "reference" not in definition
+        assert definition["members"][0]["cursor"]["spelling"] == "a"
+
+    def test_merge_declarations_without_usr(self, tmp_path, write_compilation_database):
+        # Same locations in different headers, under USRs which don't identify them
+        for i in range(2):
+            (tmp_path / f"header_{i}.hpp").write_text(
+                f'static_assert(true, "");\nnamespace {{ int anInt{i}; }}'
+            )
+        write_compilation_database(
+            tmp_path,
+            {f"file_{i}.cpp": f'#include "header_{i}.hpp"' for i in range(2)},
+        )
+
+        results = ProjectParser(
+            tmp_path, owned_files=[str(tmp_path)], merge_declarations=True
+        ).parse()
+
+        for i, result in enumerate(results):
+            static_assert, namespace = result.parsed_info["members"][1:]
+            assert static_assert["usr"] == "c:"
+            assert static_assert["members"] != []
+            assert namespace["usr"] == "c:@aN"
+            assert namespace["members"][0]["cursor"]["spelling"] == f"anInt{i}"
+            assert "reference" not in static_assert and "reference" not in namespace
+
+    def test_merge_declarations_with_dependency_graph(
+        self, tmp_path, write_compilation_database
+    ):
+        write_compilation_database(tmp_path, {"a_file.cpp": "int anInt;"})
+
+        with pytest.raises(ValueError):
+            ProjectParser(
+                tmp_path,
+                dependency_graph=DependencyGraph(str(tmp_path / "dependencies.json")),
+                merge_declarations=True,
+            )
+
+    def test_deep_nesting(self, tmp_path, write_compilation_database):
+        depth = sys.getrecursionlimit() + 100
+        (file,) = write_compilation_database(
+            tmp_path, {"a_file.cpp": "namespace a {" * depth + "}" * depth}
+        )
+        compilation_database = json.loads(
+            (tmp_path / "compile_commands.json").read_text()
+        )
+        (command,) = compilation_database
+        command["command"] = command["command"].replace(
+            " -c ", f" -fbracket-depth={depth + 1} -c "
+        )
+        (tmp_path / "compile_commands.json").write_text(
+            json.dumps(compilation_database)
+        )
+
+        (result,) = ProjectParser(tmp_path).parse()
+        (streamed,) = ProjectParser(tmp_path).parse(output_paths={file: f"{file}.json"})
+
+        assert result.error is None
+        assert streamed.error is None
+        parsed_info = result.parsed_info
+        for _ in range(depth):
+            (parsed_info,) = parsed_info["members"]
+        assert parsed_info["depth"] == depth
+
+    def test_output_paths(self, tmp_path, write_compilation_database):
+        files = write_compilation_database(
+            tmp_path,
+            {
+                f"file_{i}.cpp": f"struct AStruct{i} {{ int aField; }};"
+                for i in range(2)
+            },
+        )
+        output_paths = {file: f"{file}.json" for file in files}
+        parsed_infos = {
+            result.file: result.parsed_info
+            for result in ProjectParser(tmp_path).parse()
+        }
+
+        for project_parser in (
+            ProjectParser(tmp_path),
+            ProjectParser(tmp_path, merge_declarations=True),
+        ):
+            for result in project_parser.parse(output_paths=output_paths):
+                assert result.output_filepath == output_paths[result.file]
+                assert (
+                    utils.read_json(result.output_filepath) == parsed_infos[result.file]
+                )
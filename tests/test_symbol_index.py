@@ -0,0 +1,107 @@
+import clang_bind.generate as generate
+from clang_bind.project import ProjectParser
+from clang_bind.symbol_index import SymbolIndex
+
+
+class TestSymbolIndex:
+    def test_lookups(self, tmp_path, write_compilation_database):
+        (tmp_path / "a_header.hpp").write_text(
+            "namespace pcl { struct PointXYZ { float x; }; }"
+        )
+        write_compilation_database(
+            tmp_path,
+            {
+                f"file_{i}.cpp": f'#include "a_header.hpp"\nvoid aFunction{i}(int);'
+                for i in range(2)
+            },
+        )
+        symbol_index = SymbolIndex(str(tmp_path / "symbols.db"))
+
+        results = list(
+            ProjectParser(
+                tmp_path,
+                owned_files=[str(tmp_path / "a_header.hpp")],
+                symbol_index=symbol_index,
+            ).parse()
+        )
+
+        (point,) = symbol_index.get_by_qualified_name("pcl::PointXYZ")
+        assert point["kind"] == "STRUCT_DECL"
+        assert point["file"] == str(tmp_path / "a_header.hpp")
+        assert point["line"] == 1
+        assert symbol_index.get_by_usr(point["usr"]) == [point]
+        (field,) = symbol_index.get_by_qualified_name("pcl::PointXYZ::x")
+        assert field["type"] == "float"
+        # Shared declarations are stored once
+        assert len(symbol_index.get_by_qualified_name("pcl")) == 1
+        (function,) = symbol_index.get_by_qualified_name("aFunction1")
+        assert function["type"] == "void (int)"
+        assert results[1].symbols
+
+    def test_update_drops_stale_symbols(self, tmp_path, write_compilation_database):
+        write_compilation_database(tmp_path, {"a_file.cpp": "int anInt;"})
+        symbol_index = SymbolIndex(str(tmp_path / "symbols.db"))
+        list(ProjectParser(tmp_path, symbol_index=symbol_index).parse())
+
+        (tmp_path / "a_file.cpp").write_text("int anotherInt;")
+        list(ProjectParser(tmp_path, symbol_index=symbol_index).parse())
+
+        assert symbol_index.get_by_qualified_name("anInt") == []
+        assert len(symbol_index.get_by_qualified_name("anotherInt")) == 1
+
+    def test_generate_resolves_type_refs(self, tmp_path, write_compilation_database):
+        write_compilation_database(
+            tmp_path,
+            {
+                "a_file.cpp": """
+                namespace pcl { struct PointXYZ {}; }
+                struct ABase {};
+                struct AStruct : ABase { AStruct(pcl::PointXYZ& aPoint) {} };
+                """
+            },
+        )
+        symbol_index = SymbolIndex(str(tmp_path / "symbols.db"))
+        (result,) = ProjectParser(tmp_path, symbol_index=symbol_index).parse()
+
+        lines = generate.generate(
+            module_name="pcl",
+            parsed_info=result.parsed_info,
+            symbol_index=symbol_index,
+        )
+
+        assert 'py::class_<AStruct,ABase>(m, "AStruct")' in lines
+        assert ".def(py::init<pcl::PointXYZ &>())" in lines
+
+    def test_template_class_names(self, tmp_path, write_compilation_database):
+        # The template's parameters are not handled by generate, only its specialization is parsed
+        (tmp_path / "a_header.hpp").write_text(
+            "template <typename T> struct ATemplate {};"
+        )
+        write_compilation_database(
+            tmp_path,
+            {
+                "a_file.cpp": """
+                #include "a_header.hpp"
+                namespace pcl { namespace io { struct PointXYZ {}; } }
+                template <> struct ATemplate<pcl::io::PointXYZ> {};
+                """
+            },
+        )
+        symbol_index = SymbolIndex(str(tmp_path / "symbols.db"))
+        (result,) = ProjectParser(tmp_path, symbol_index=symbol_index).parse()
+
+        def generate_lines(symbol_index):
+            return generate.generate(
+                module_name="pcl",
+                parsed_info=result.parsed_info,
+                symbol_index=symbol_index,
+            )
+
+        # Spellings are kept as is without a symbol index, as before it existed
+        assert 'py::class_<ATemplate<io::PointXYZ>>(m, "ATemplate_io::PointXYZ")' in (
+            generate_lines(None)
+        )
+        assert (
+            'py::class_<ATemplate<pcl::io::PointXYZ>>(m, "ATemplate_PointXYZ")'
+            in generate_lines(symbol_index)
+        )
@@ -0,0 +1,63 @@
+import gzip
+import lzma
+
+import pytest
+
+import clang_bind.generate as generate
+import clang_bind.utils as utils
+from clang_bind.project import ProjectParser
+
+
+class TestCompression:
+    @pytest.mark.parametrize("extension, module", [(".gz", gzip), (".xz", lzma)])
+    def test_round_trip(self, tmp_path, extension, module, parse_source):
+        parser = parse_source()
+        parsed_info = parser.get_dict()
+        filepath = tmp_path / f"a_file.json{extension}"
+        stream_filepath = tmp_path / f"a_stream.json{extension}"
+
+        utils.dump_json(filepath, parsed_info)
+        utils.dump_json_stream(stream_filepath, parser.iter_dicts(), indent=2)
+
+        with module.open(filepath, "rt") as f:
+            text = f.read()
+        assert filepath.stat().st_size < len(text)
+        assert utils.read_json(filepath) == parsed_info
+        assert utils.read_json(stream_filepath) == parsed_info
+        assert generate.generate(
+            module_name="pcl", source=str(filepath)
+        ) == generate.generate(module_name="pcl", parsed_info=parsed_info)
+
+    def test_project_output(self, tmp_path, write_compilation_database, source):
+        files = write_compilation_database(tmp_path, {"a_file.cpp": source})
+        output_paths = {files[0]: str(tmp_path / "a_file.json.gz")}
+
+        (result,) = ProjectParser(tmp_path, json_index=True).parse(
+            output_paths=output_paths
+        )
+
+        (expected,) = ProjectParser(tmp_path).parse()
+        assert utils.read_json(result.output_filepath) == expected.parsed_info
+        # Compressed files are not mapped, thus not indexed
+        assert not (tmp_path / "a_file.json.gz.index").exists()
+
+
+class TestGetOutputPath:
+    @pytest.mark.parametrize(
+        "source, expected",
+        [
+            ("src/a_file.cpp", "json/a_file.json"),
+            ("src/a.file.cpp", "json/a.file.json"),
+            ("src/a_file.json.gz", "json/a_file.json"),
+            ("src/a_file.json.xz", "json/a_file.json"),
+        ],
+    )
+    def test_extensions(self, tmp_path, source, expected):
+        output_path = utils.get_output_path(
+            source=str(tmp_path / source),
+            output_dir=str(tmp_path / "json"),
+            split_from=str(tmp_path / "src"),
+            extension=".json",
+        )
+
+        assert output_path == str(tmp_path / expected)